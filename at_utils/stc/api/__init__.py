@@ -1,4 +1,6 @@
 import logging
+import time
+from typing import Type
 
 import Assets
 import Auth
@@ -8,7 +10,12 @@ import Settings
 import Tenants
 import HttpClient
 
+from .http_pool import ConnectionPool, get_default_pool
+from .metrics import ApiMetrics, get_default_metrics
+from .models import Record, decode, plain
 from .organizations import Organizations
+from .rate_limit import RateLimiter
+from .retry import DEFAULT_RETRY_POLICY, RetryPolicy
 from .schedules import Schedules
 
 logger = logging.getLogger()
@@ -19,9 +26,25 @@ class MDRRestAPi(HttpClient):
         Auth, Assets, Comments, Tenants, Incidents, Schedules, Organizations, Settings
     ]
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, pool: ConnectionPool = None, retry_policy: RetryPolicy = None,
+                 rate_limiter: RateLimiter = None, metrics: ApiMetrics = None, models: bool = False,
+                 **kwargs):
+        """
+        param: pool: HTTP connection pool, process wide pool by default
+        param: retry_policy: retry of failed requests, DEFAULT_RETRY_POLICY by default
+        param: rate_limiter: client side limits per endpoint, pass one limiter to clients sharing a server budget
+        param: metrics: statistics of requests per endpoint, process wide metrics by default
+        param: models: return slot based records (models.py) instead of dicts from listing and details calls
+        """
         super(MDRRestAPi, self).__init__(*args, **kwargs)
 
+        self.pool = pool or get_default_pool()
+        self.pool.attach(self)
+        self.retry_policy = retry_policy or DEFAULT_RETRY_POLICY
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics or get_default_metrics()
+        self.models = models
+
         self.auth = None
         self.assets = None
         self.tenants = None
@@ -35,3 +58,56 @@ class MDRRestAPi(HttpClient):
         for e in self._WRAPPERS:
             attr_name = e.__name__.lower()
             setattr(self, attr_name, e(self))
+
+    def decode(self, response, model: Type[Record]):
+        """
+        Response body as dicts or as records of the model, see models
+        """
+        if not self.models:
+            return response.json()
+        return decode(response.content, model)
+
+    @staticmethod
+    def endpoint(path: str) -> str:
+        """
+        Endpoint template of request path, every MDR path starts with client id: /{client_id}/incidents/list
+        """
+        client_id, _, rest = path.lstrip('/').partition('/')
+        return f'/{{client_id}}/{rest}' if client_id and rest else path
+
+    def _timed_post(self, endpoint: str, path: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = super(MDRRestAPi, self).post(path, **kwargs)
+        except Exception as e:
+            self.metrics.record(endpoint, time.perf_counter() - started, error=e)
+            raise
+        self.metrics.record(endpoint, time.perf_counter() - started, response)
+        return response
+
+    def _send(self, endpoint: str, path: str, **kwargs):
+        if not self.rate_limiter:
+            return self._timed_post(endpoint, path, **kwargs)
+
+        with self.rate_limiter.slot(endpoint):
+            return self._timed_post(endpoint, path, **kwargs)
+
+    def post(self, path: str, retry_policy: RetryPolicy = None, idempotent: bool = True, **kwargs):
+        """
+        param: retry_policy: overrides retry policy of the client for this request
+        param: idempotent: False for creates, the request is not resent after errors it may have been processed with
+        """
+        auth = getattr(self, 'auth', None)
+        if auth:
+            auth.token_manager.ensure_fresh()
+
+        if kwargs.get('json') is not None:
+            # records returned with models=True can be sent back as request bodies
+            kwargs['json'] = plain(kwargs['json'])
+
+        endpoint = self.endpoint(path)
+        retry_policy = retry_policy or self.retry_policy
+        if not idempotent:
+            retry_policy = retry_policy.non_idempotent()
+        return retry_policy.send(lambda: self._send(endpoint, path, **kwargs),
+                                 on_retry=lambda attempt, reason: self.metrics.record_retry(endpoint))
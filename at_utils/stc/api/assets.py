@@ -1,6 +1,7 @@
 from http import HTTPStatus
 
 from ..decorators import for_all_methods, token_update
+from .models import Asset
 
 
 @for_all_methods(token_update)
@@ -25,7 +26,7 @@ class Assets:
         response = self.mdr_api.post(f'/{self.client_id}/assets/details', json=body)
         assert response.status_code == HTTPStatus.OK, \
             f"Details has not been received. SC: {response.status_code}. Msg: {response.text}"
-        return response.json()
+        return self.mdr_api.decode(response, Asset)
 
     def asset(self, hostname):
         if isinstance(hostname, str):
@@ -40,14 +41,14 @@ class Assets:
         response = self.mdr_api.post(f'/{self.client_id}/assets/list', json=body)
         assert response.status_code == HTTPStatus.OK, \
             f"Assets list has not been received. SC: {response.status_code}. Msg: {response.text}"
-        return response.json()
+        return self.mdr_api.decode(response, Asset)
 
     def all_assets(self, body: dict):
         response = self.mdr_api.post(f'/{self.client_id}/assets/list', json=body)
         assert response.status_code == HTTPStatus.OK, \
             f"Assets list has not been received. SC: {response.status_code}. Msg: {response.text}"
 
-        return response.json()
+        return self.mdr_api.decode(response, Asset)
 
     def suggestion(self, body: dict):
         response = self.mdr_api.post(f'/{self.client_id}/assets/suggestion', json=body)
@@ -0,0 +1,110 @@
+import asyncio
+import functools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Iterable, List
+
+from . import MDRRestAPi
+
+
+class AsyncRunner:
+    """
+    Runs blocking calls in a bounded thread pool, concurrency is limited with a semaphore of the running loop
+    """
+
+    def __init__(self, concurrency: int = 32):
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='mdr_async')
+        self._semaphore = None
+        self._semaphore_loop = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # semaphore is bound to a loop, a new one is created when the runner is used in another loop
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop() is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._semaphore_loop = weakref.ref(loop)
+        return self._semaphore
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def gather(self, calls: Iterable[Awaitable], return_exceptions: bool = False) -> List[Any]:
+        return await asyncio.gather(*calls, return_exceptions=return_exceptions)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    async def aclose(self) -> None:
+        """
+        close() without blocking the loop while calls in flight are finished
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+
+class AsyncWrapper:
+    """
+    Awaitable facade over a synchronous object.
+    Methods become coroutine functions and properties become awaitables, plain attributes are returned as is.
+    Property setters: await wrapper.set('auto_accept', True)
+    """
+
+    def __init__(self, wrapped: Any, runner: AsyncRunner):
+        self._wrapped = wrapped
+        self._runner = runner
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if isinstance(getattr(type(self._wrapped), name, None), property):
+            return self._runner.run(getattr, self._wrapped, name)
+
+        value = getattr(self._wrapped, name)
+        if not callable(value) or isinstance(value, type):
+            return value
+
+        @functools.wraps(value)
+        async def method(*args, **kwargs):
+            return await self._runner.run(value, *args, **kwargs)
+
+        return method
+
+    async def set(self, name: str, value: Any) -> None:
+        await self._runner.run(setattr, self._wrapped, name, value)
+
+
+class AsyncMDRRestAPi(AsyncRunner):
+    """
+    Asyncio variant of MDRRestAPi with the same wrappers: await api.incidents.create(body).
+    Token state is shared with the synchronous client, requests are sent by at most concurrency threads
+    """
+
+    def __init__(self, *args, api: MDRRestAPi = None, concurrency: int = 32, **kwargs):
+        """
+        param: api: synchronous client to share token state with, created from args and kwargs if not passed
+        param: concurrency: max number of requests in flight
+        """
+        super(AsyncMDRRestAPi, self).__init__(concurrency)
+        self.api = api or MDRRestAPi(*args, **kwargs)
+
+        self.auth = None
+        self.assets = None
+        self.tenants = None
+        self.incidents = None
+        self.schedules = None
+        self.organizations = None
+        self.settings = None
+        self.comments = None
+
+        for e in MDRRestAPi._WRAPPERS:
+            attr_name = e.__name__.lower()
+            setattr(self, attr_name, AsyncWrapper(getattr(self.api, attr_name), self))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
@@ -1,5 +1,9 @@
 import logging
+import threading
+import time
 import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from http import HTTPStatus
 from typing import List
 from uuid import uuid4
@@ -9,6 +13,12 @@ import requests
 from at_utils import TEST_ENV_E2E
 from at_utils.secrets import Secret
 
+from .http_pool import get_default_pool
+from .models import Session
+from .retry import DEFAULT_RETRY_POLICY
+from .session_cache import SessionCache
+from .token_manager import TokenManager, token_expiration
+
 logger = logging.getLogger()
 
 
@@ -19,14 +29,53 @@ class Auth:
         self.password = None
         self.client_id = None
         self.tenants = None
+        self.role = None
+        self.uis_url = None
         self.refresh_token = None
         self.access_token = None
-        self.uis_token = None
+        self.__uis_token = None
         self.session_id = None
         self.__sessions = None
+        self.session_cache = SessionCache.from_env()
+        self.token_manager = TokenManager(self)
+        # single-flight guard: one login/refresh at a time, other threads wait and reuse its token
+        self._refresh_lock = threading.RLock()
+        self._deleted_sessions = set()
+
+    @property
+    def uis_token(self):
+        """
+        UIS token is requested on demand when the session was restored from session cache
+        and again when it has expired
+        """
+        if self.login and (self.__uis_token is None or self._uis_token_expired()):
+            self.__uis_token = Secret(self._uis_token(self.login, self.password, self.mdr_api.pool.session,
+                                                      url=self.uis_url))
+        return self.__uis_token
+
+    @uis_token.setter
+    def uis_token(self, value):
+        self.__uis_token = value
+
+    def _uis_token_expired(self) -> bool:
+        try:
+            expires_at = token_expiration(self.__uis_token.value)
+        except jwt.PyJWTError:
+            return False
+        return expires_at is not None and time.time() >= expires_at - self.token_manager.leeway
+
+    @property
+    def session_shared(self):
+        """
+        Sessions from session cache are used by other processes and must not be deleted on re-login
+        """
+        return self.session_cache is not None
 
     @classmethod
-    def _uis_token(cls, login: str, password: (Secret, str)):
+    def _uis_token(cls, login: str, password: (Secret, str), session: requests.Session = None, url: str = None):
+        """
+        param: url: UIS address, TEST_ENV_E2E.uis_url by default
+        """
         body = {
             "grant_type": "password",
             "client_id": TEST_ENV_E2E.uis_client_id,
@@ -36,8 +85,9 @@ class Auth:
         }
 
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        url = f'{TEST_ENV_E2E.uis_url}/connect/token'
-        response = requests.post(url, headers=headers, data=body)
+        url = f'{url or TEST_ENV_E2E.uis_url}/connect/token'
+        session = session or get_default_pool().session
+        response = DEFAULT_RETRY_POLICY.send(lambda: session.post(url, headers=headers, data=body))
         assert response.status_code == HTTPStatus.OK, f'Invalid uis access token. Status code {response.status_code}'
         return response.json()['access_token']
 
@@ -56,13 +106,14 @@ class Auth:
         self.mdr_api.add_headers({'Request-ID': uuid4().hex})  # add Request-ID for logs search
         self.mdr_api.set_token(uis_token.value)  # set temp uis token
 
-        response = self.mdr_api.post(f'/{client_id}/robot_session/create', json=body)
+        response = self.mdr_api.post(f'/{client_id}/robot_session/create', json=body, idempotent=False)
 
         assert response.status_code == HTTPStatus.OK, \
             f'Invalid mdr refresh token. SC: {response.status_code}. Msg: {response.text}'
 
-        if self.session_id:
+        if self.session_id and not self.session_shared:
             self.delete_session()
+            self._deleted_sessions.add(str(uuid.UUID(self.session_id)))
 
         response = response.json()
         refresh_token = response['refresh_token']
@@ -70,6 +121,10 @@ class Auth:
         return refresh_token
 
     def restart_refresh_token(self):
+        with self._refresh_lock:
+            self._restart_refresh_token()
+
+    def _restart_refresh_token(self):
         response = self.mdr_api.post(f'/{self.client_id}/session/restart', json={})
         assert response.status_code == HTTPStatus.OK, \
             f'Invalid mdr refresh token. SC: {response.status_code}. Msg: {response.text}'
@@ -90,19 +145,117 @@ class Auth:
 
         self.refresh_token = response['refresh_token']
         self.access_token = response['access_token']
+        self.token_manager.track(self.access_token)
         return self.access_token
 
     def to_login(self, **kwargs):
-        self.login = kwargs.pop('login', TEST_ENV_E2E.mdr_login)
-        self.password = Secret(kwargs.pop('password', TEST_ENV_E2E.mdr_pswd))
-        self.client_id = kwargs.pop('client_id', TEST_ENV_E2E.mdr_client_id)
-        self.tenants = kwargs.pop('tenants', [{"tenant_id": "-"}])
-        assert not kwargs, f'Unknown parameters {kwargs}'
-
-        self.uis_token = Secret(self._uis_token(self.login, self.password))
-        self.refresh_token = self._refresh_token(self.uis_token, self.client_id, tenants=self.tenants)
+        with self._refresh_lock, self.token_manager.refreshing():
+            self.login = kwargs.pop('login', TEST_ENV_E2E.mdr_login)
+            self.password = Secret(kwargs.pop('password', TEST_ENV_E2E.mdr_pswd))
+            self.client_id = kwargs.pop('client_id', TEST_ENV_E2E.mdr_client_id)
+            self.tenants = kwargs.pop('tenants', [{"tenant_id": "-"}])
+            self.role = kwargs.pop('role', "SUPERVISOR")
+            # UIS token of another session of the same user saves the password grant
+            uis_token = kwargs.pop('uis_token', None)
+            assert not kwargs, f'Unknown parameters {kwargs}'
+
+            self.token_manager.cancel()
+            self.uis_token = uis_token
+            if self.session_cache:
+                self._login_with_cache()
+            else:
+                self._login()
+
+    def _login(self):
+        # uis_token is requested here unless to_login got it
+        self.refresh_token = self._refresh_token(self.uis_token, self.client_id, role=self.role, tenants=self.tenants)
         self.mdr_api.set_token(self._access_token)
 
+    def _login_with_cache(self):
+        """
+        Reuse the session from session cache, only the first process creates it
+        """
+        key = self.session_cache.key(self.client_id, self.tenants, self.role)
+        with self.session_cache.locked():
+            if not self._confirm_cached_session(key):
+                self._login()
+            self.session_cache.put(key, self.refresh_token, self.session_id)
+
+    def _refresh_with_cache(self, relogin: bool = True):
+        if relogin:
+            self._login_with_cache()
+            return
+
+        key = self.session_cache.key(self.client_id, self.tenants, self.role)
+        with self.session_cache.locked():
+            assert self._confirm_cached_session(key), f'Cached session {self.session_id} was not refreshed'
+            self.session_cache.put(key, self.refresh_token, self.session_id)
+
+    def _confirm_cached_session(self, key: str) -> bool:
+        entry = self.session_cache.get(key)
+        if not entry:
+            return False
+
+        self.refresh_token = entry['refresh_token'].value
+        self.session_id = entry['session_id']
+        try:
+            self.mdr_api.set_token(self._access_token)
+        except AssertionError as e:
+            logger.info(f'Cached session {self.session_id} is not valid anymore. {e}')
+            self.session_cache.remove(key)
+            return False
+
+        logger.info(f'Session {self.session_id} was restored from session cache')
+        return True
+
+    def relogin(self):
+        """
+        Full login with parameters of the current session
+        """
+        self.to_login(login=self.login, password=self.password.value, client_id=self.client_id,
+                      tenants=self.tenants, role=self.role)
+
+    def wait_for_refresh(self):
+        """
+        Block while another thread is logging in or refreshing the token
+        """
+        with self._refresh_lock:
+            pass
+
+    def refresh(self, token: str = None, force: bool = True, relogin: bool = True):
+        """
+        Renew access token with refresh token (session/confirm).
+        Full login is done only if refresh token is not valid anymore.
+        Concurrent callers wait for the refresh in flight and reuse its token
+        param: token: stale access token, current token by default
+        param: force: refresh even if token does not expire soon
+        param: relogin: login again if refresh token is not valid, otherwise raise AssertionError
+        """
+        stale_token = token or self.access_token
+        with self._refresh_lock, self.token_manager.refreshing():
+            if self.access_token != stale_token:
+                return self.access_token
+            if not force and not self.token_manager.expires_soon:
+                return self.access_token
+
+            if self.session_cache:
+                # refresh token is rotated by every confirm, take the latest one from other processes
+                self._refresh_with_cache(relogin)
+                return self.access_token
+
+            try:
+                access_token = self._access_token
+            except AssertionError as e:
+                if not relogin:
+                    raise
+                logger.warning(f'Refresh token is not valid, login again. {e}')
+                self.relogin()
+                return self.access_token
+
+            self.mdr_api.set_token(access_token)
+            logger.info(f'Access token of session {self.session_id} was refreshed')
+            return access_token
+
     def update_access_token(self, token: str = None):
         access_token = token if token else self.access_token
         # get session_id from token
@@ -110,9 +263,14 @@ class Auth:
         previous_session_id = parsed_token['sub'].split('+')[-1]
         previous_session_id = str(uuid.UUID(previous_session_id))
 
-        self.to_login()
+        with self._refresh_lock:
+            if previous_session_id in self._deleted_sessions or \
+                    self.session_id and previous_session_id != str(uuid.UUID(self.session_id)):
+                # session of the stale token was already replaced by another thread
+                return self.access_token
 
-        self.delete_session(previous_session_id)
+            # refresh() logs in again with the parameters of the current session if needed
+            return self.refresh(token=access_token)
 
     @property
     def sessions(self):
@@ -122,10 +280,13 @@ class Auth:
         response = self.mdr_api.post(f'/{self.client_id}/robot_sessions/list', json={})
         assert response.status_code == HTTPStatus.OK, \
             f"Count has not been received. SC: {response.status_code}. Msg: {response.text}"
-        self.__sessions = response.json()
+        self.__sessions = self.mdr_api.decode(response, Session)
 
         return self.__sessions
 
+    def invalidate_sessions(self):
+        self.__sessions = None
+
     def delete(self, session_id: str):
         body = {
             "session_id": session_id
@@ -133,29 +294,72 @@ class Auth:
         response = self.mdr_api.post(f'/{self.client_id}/robot_sessions/delete', json=body)
         assert response.status_code == HTTPStatus.OK, \
             f"Can't delete session. SC: {response.status_code}. Msg: {response.text}"
+        self.invalidate_sessions()
         return response.json()
 
     def delete_session(self, session_id: str = None):
         session_id = session_id if session_id else self.session_id
+        if session_id == self.session_id:
+            # access token of the deleted session must not be refreshed anymore
+            self.token_manager.cancel()
 
         self.delete(session_id)
         logger.info(f'Session {session_id} was deleted')
 
     def delete_sessions(self, **kwargs):
+        """
+        Delete all robot sessions except the current one and excluded
+        param: exclude: session names to keep
+        param: exclude_key: keep sessions which name contains it
+        param: concurrency: number of parallel delete requests
+        param: dry_run: only return summary of sessions which would be deleted
+        param: progress_every: log progress every N deleted sessions
+        :return: summary dict
+        """
         exclude: List = kwargs.pop('exclude', [])
         exclude_key: str = kwargs.pop('exclude_key', '~')
+        concurrency: int = kwargs.pop('concurrency', 8)
+        dry_run: bool = kwargs.pop('dry_run', False)
+        progress_every: int = kwargs.pop('progress_every', 100)
+        assert not kwargs, f'Unknown parameters {kwargs}'
 
+        self.invalidate_sessions()
         sessions = filter(lambda x: self.session_id not in x['session_id'], self.sessions)
         sessions = filter(lambda x: not (exclude_key in x['session_name'] or x['session_name'] in exclude), sessions)
         sessions = list(sessions)
 
-        for session in sessions:
-            self.delete(session['session_id'])
-            logger.info(f'Session id {session["session_id"]}: session name {session["session_name"]} was deleted')
-
-        logger.info(f'{len(sessions)} sessions has deleted')
+        summary = {
+            "selected": len(sessions),
+            "by_name_prefix": dict(Counter(session['session_name'].split('_')[0] for session in sessions)),
+            "deleted": [],
+            "failed": {},
+            "dry_run": dry_run,
+        }
+        if dry_run:
+            logger.info(f'Dry run: {len(sessions)} sessions would be deleted {summary["by_name_prefix"]}')
+            return summary
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix='mdr_sessions') as executor:
+            futures = {executor.submit(self.delete, session['session_id']): session for session in sessions}
+            for done, future in enumerate(as_completed(futures), start=1):
+                session = futures[future]
+                try:
+                    future.result()
+                    summary["deleted"].append(session['session_id'])
+                    logger.debug(f'Session id {session["session_id"]}: '
+                                 f'session name {session["session_name"]} was deleted')
+                except (AssertionError, OSError) as e:
+                    summary["failed"][session['session_id']] = str(e)
+                if done % progress_every == 0:
+                    logger.info(f'{done}/{len(sessions)} sessions processed in {time.monotonic() - started:.1f}s')
+
+        logger.info(f'{len(summary["deleted"])} sessions has deleted, {len(summary["failed"])} failed '
+                    f'in {time.monotonic() - started:.1f}s')
 
         self.delete_session()
+        self.invalidate_sessions()
+        return summary
 
     def delete_extra_sessions(self):
         """
@@ -0,0 +1,68 @@
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Thread safe key/value storage where every entry expires ttl seconds after it was stored.
+    ttl=None keeps entries until they are invalidated explicitly
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.RLock()
+        self._load_locks = {}
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.monotonic() - stored_at >= self.ttl
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+
+            value, stored_at = entry
+            if self._expired(stored_at):
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key: Hashable, value: Any) -> Any:
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+        return value
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return cached value or call loader once even if several threads miss the same key
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            value = self.get(key, missing)
+            if value is missing:
+                value = self.set(key, loader())
+        return value
+
+    def invalidate(self, key: Hashable = None) -> None:
+        """
+        Drop one entry or the whole cache if key is not passed
+        """
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def __contains__(self, key: Hashable) -> bool:
+        missing = object()
+        return self.get(key, missing) is not missing
@@ -1,6 +1,7 @@
 from http import HTTPStatus
 
 from ..decorators import for_all_methods, token_update
+from .models import Comment
 
 
 @for_all_methods(token_update)
@@ -13,10 +14,10 @@ class Comments:
         return self.mdr_api.auth.client_id
 
     def create(self, body):
-        response = self.mdr_api.post(f"/{self.client_id}/comments/create", json=body)
+        response = self.mdr_api.post(f"/{self.client_id}/comments/create", json=body, idempotent=False)
         assert response.status_code == HTTPStatus.OK,\
             f"Failed to create comment. SC: {response.status_code}. Msg: {response.text}"
-        return response.json()
+        return self.mdr_api.decode(response, Comment)
 
     def delete(self, body: dict):
         response = self.mdr_api.post(f"/{self.client_id}/comments/delete", json=body)
@@ -0,0 +1,694 @@
+import base64
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+logger = logging.getLogger()
+
+ROOT_TENANT = "-"
+PRIORITIES = ["HIGH", "NORMAL", "LOW"]
+ASSET_STATUSES = ["OK", "WARNING", "CRITICAL", "OFFLINE"]
+OS_VERSIONS = ["Windows 10 Pro", "Windows 11 Enterprise", "Windows Server 2019", "Ubuntu 20.04", "CentOS 7",
+               "macOS 13"]
+PRODUCTS = ["KES", "KEA", "KATA", "KSC", "KESL"]
+HOST_PREFIXES = ["WS", "SRV", "DC", "LAPTOP", "DEV", "QA"]
+RESOLUTIONS = {"FALSE_POSITIVE": "False positive", "TRUE_POSITIVE": "True positive", "NOT_SET": "Not set"}
+
+
+class FakeError(Exception):
+    def __init__(self, status: int, message: str, headers: dict = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+def _b64(data: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b'=').decode()
+
+
+def unsigned_jwt(claims: dict) -> str:
+    """
+    JWT without signature, clients decode it with verify_signature=False
+    """
+    return f'{_b64({"alg": "none", "typ": "JWT"})}.{_b64(claims)}.'
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class FakeClient:
+    """
+    Seeded synthetic data of one MDR client
+    """
+
+    def __init__(self, client_id: str, seed: int, assets: int, incidents: int, tenants: int):
+        self.client_id = client_id
+        rnd = random.Random(f'{seed}:{client_id}')
+        self.rnd = rnd
+        self.last_record_time = 0
+        self.auto_response = False
+        self.schedules: List[dict] = []
+        self.history: List[dict] = []
+        self.comments: Dict[str, dict] = {}
+
+        self.tenants: Dict[str, dict] = {ROOT_TENANT: {"tenant_id": ROOT_TENANT, "tenant_name": "root"}}
+        for number in range(tenants):
+            tenant_id = str(uuid.UUID(int=rnd.getrandbits(128)))
+            self.tenants[tenant_id] = {"tenant_id": tenant_id, "tenant_name": f"tenant_{number}"}
+        tenant_ids = list(self.tenants)
+
+        now = _now_ms()
+        self.assets: Dict[str, dict] = {}
+        for number in range(assets):
+            asset_id = uuid.UUID(int=rnd.getrandbits(128)).hex.upper()
+            first_seen = now - rnd.randint(30, 365) * 86400000
+            self.assets[asset_id] = {
+                "asset_id": asset_id,
+                "host_name": f'{rnd.choice(HOST_PREFIXES)}-{number:06d}',
+                "first_seen": first_seen,
+                "last_seen": rnd.randint(first_seen, now),
+                "installed_product_info": [{"product": product, "version": "12.0.0"}
+                                           for product in rnd.sample(PRODUCTS, 2)],
+                "ksc_host_id": str(uuid.UUID(int=rnd.getrandbits(128))),
+                "isolation": rnd.random() < 0.05,
+                "status": rnd.choice(ASSET_STATUSES),
+                "os_version": rnd.choice(OS_VERSIONS),
+                "product_map": rnd.sample(PRODUCTS, rnd.randint(1, 3)),
+                "tenant_name": self.tenants[rnd.choice(tenant_ids)]["tenant_name"],
+            }
+
+        self.incidents: Dict[str, dict] = {}
+        self.incident_number = 0
+        asset_list = list(self.assets.values())
+        for _ in range(incidents):
+            asset = rnd.choice(asset_list) if asset_list else None
+            self.add_incident({
+                "affected_hosts": [f'{asset["host_name"]}:{asset["asset_id"]}'] if asset else [],
+                "client_description": "",
+                "summary": f'Seeded incident {self.incident_number + 1}',
+                "priority": rnd.choice(PRIORITIES),
+                "tenant_id": rnd.choice(tenant_ids),
+            }, creation_time=now - rnd.randint(1, 90 * 86400000))
+        self.history.sort(key=lambda record: record["record_time"])
+
+    def record_time(self) -> int:
+        """
+        Strictly increasing record time, several records of one request never share it
+        """
+        self.last_record_time = max(_now_ms(), self.last_record_time + 1)
+        return self.last_record_time
+
+    def add_history(self, operation: str, kind: str, entity: dict, session_id: str = None, record_time=None):
+        self.history.append({
+            "operation": operation,
+            "record_time": record_time or self.record_time(),
+            "entity": {kind: dict(entity)},
+            "_session_id": session_id,
+        })
+
+    def add_incident(self, body: dict, session_id: str = None, creation_time: int = None) -> dict:
+        creation_time = creation_time or self.record_time()
+        self.incident_number += 1
+        tenant_id = body.get("tenant_id") or ROOT_TENANT
+        incident = {
+            "incident_id": uuid.UUID(int=self.rnd.getrandbits(128)).hex,
+            "summary": body.get("summary", ""),
+            "priority": body.get("priority", "HIGH"),
+            "status": "Open",
+            "resolution": "Not set",
+            "affected_hosts": list(body.get("affected_hosts") or []),
+            "affected_hosts_mappings": [],
+            "host_based_iocs": [],
+            "network_based_iocs": [],
+            "detection_technology": "",
+            "creation_time": creation_time,
+            "update_time": creation_time,
+            "attack_stage": "",
+            "mitre_tactics": [],
+            "mitre_techniques": [],
+            "description": "",
+            "incident_number": self.incident_number,
+            "client_description": body.get("client_description", ""),
+            "status_description": "",
+            "origin": "MDR",
+            "attachments": [],
+            "comments": [],
+            "iocs": [],
+            "responses": [],
+            "tenant_name": self.tenants.get(tenant_id, self.tenants[ROOT_TENANT])["tenant_name"],
+            "was_read": False,
+        }
+        self.incidents[incident["incident_id"]] = incident
+        self.add_history("create", "incident_details", incident, session_id, record_time=creation_time)
+        return incident
+
+
+class FakeMDRServer:
+    """
+    In-process MDR portal and UIS for benchmarks and offline runs of client side code.
+    Both APIs are served by one ThreadingHTTPServer: UIS at <url>/connect/token, MDR at <url>/api/v1.
+    Data is synthetic and reproducible for the same seed:
+        with FakeMDRServer(seed=1, assets=5000, latency=0.02) as server:
+            manager = MDRManager(**server.manager_kwargs())
+    """
+
+    def __init__(self, seed: int = 0, assets: int = 1000, incidents: int = 200, tenants: int = 2,
+                 latency: float = 0, jitter: float = 0, token_ttl: float = 300, error_rate: float = 0,
+                 client_id: str = 'fake-client', host: str = '127.0.0.1', port: int = 0):
+        """
+        param: latency: seconds added to every response
+        param: jitter: random extra latency up to jitter seconds
+        param: token_ttl: lifetime of UIS and access tokens in seconds
+        param: error_rate: share of MDR requests answered with 503
+        """
+        self.seed = seed
+        self.assets_count = assets
+        self.incidents_count = incidents
+        self.tenants_count = tenants
+        self.latency = latency
+        self.jitter = jitter
+        self.token_ttl = token_ttl
+        self.error_rate = error_rate
+        self.client_id = client_id
+        self.endpoint_latency: Dict[str, float] = {}
+        self.calls = Counter()
+
+        self._lock = threading.RLock()
+        self._rnd = random.Random(seed)
+        self._clients: Dict[str, FakeClient] = {}
+        self._sessions: Dict[str, dict] = {}
+        # UIS token -> expiration time
+        self._uis_tokens: Dict[str, float] = {}
+        self._errors: List[dict] = []
+        self._tokens_not_before = 0
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def manager_kwargs(self) -> dict:
+        """
+        MDRManager arguments pointing to the fake server
+        """
+        return {"url": self.url, "uis_url": self.url, "client_id": self.client_id}
+
+    def start(self) -> "FakeMDRServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake_mdr', daemon=True)
+        self._thread.start()
+        logger.info(f'Fake MDR server is listening on {self.url}')
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    """
+    -------------CONTROL-------------
+    """
+
+    def client(self, client_id: str = None) -> FakeClient:
+        client_id = client_id or self.client_id
+        with self._lock:
+            if client_id not in self._clients:
+                self._clients[client_id] = FakeClient(client_id, self.seed, self.assets_count,
+                                                      self.incidents_count, self.tenants_count)
+            return self._clients[client_id]
+
+    def inject_error(self, endpoint: str = '', status: int = HTTPStatus.SERVICE_UNAVAILABLE, count: int = 1,
+                     retry_after: float = None) -> None:
+        """
+        Answer the next count requests to endpoint template prefix (/{client_id}/assets/list) with status
+        """
+        headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+        with self._lock:
+            self._errors.append({"endpoint": endpoint, "status": status, "count": count, "headers": headers})
+
+    def expire_tokens(self, uis: bool = False) -> None:
+        """
+        Reject all access tokens issued so far, refresh tokens stay valid
+        param: uis: expire UIS tokens as well
+        """
+        with self._lock:
+            self._tokens_not_before = time.time()
+            if uis:
+                self._uis_tokens = dict.fromkeys(self._uis_tokens, 0)
+
+    @contextmanager
+    def slow(self, endpoint: str, latency: float):
+        self.endpoint_latency[endpoint] = latency
+        try:
+            yield
+        finally:
+            self.endpoint_latency.pop(endpoint, None)
+
+    @property
+    def sessions(self) -> List[dict]:
+        with self._lock:
+            return [dict(session) for session in self._sessions.values()]
+
+    """
+    -------------REQUEST HANDLING-------------
+    """
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                server._dispatch(self)
+
+            def log_message(self, format, *args):
+                logger.debug(f'Fake MDR server: {format % args}')
+
+        return Handler
+
+    def _delay(self, endpoint: str) -> None:
+        latency = self.endpoint_latency.get(endpoint, self.latency)
+        if self.jitter:
+            latency += self._rnd.uniform(0, self.jitter)
+        if latency:
+            time.sleep(latency)
+
+    def _injected_error(self, endpoint: str) -> Optional[FakeError]:
+        with self._lock:
+            for error in self._errors:
+                if endpoint.startswith(error["endpoint"]):
+                    error["count"] -= 1
+                    if not error["count"]:
+                        self._errors.remove(error)
+                    return FakeError(error["status"], 'Injected error', error["headers"])
+            if self.error_rate and endpoint != '/connect/token' and self._rnd.random() < self.error_rate:
+                return FakeError(HTTPStatus.SERVICE_UNAVAILABLE, 'Injected error')
+        return None
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler) -> None:
+        raw = handler.rfile.read(int(handler.headers.get('Content-Length') or 0))
+        path = handler.path.split('?')[0]
+        client_id, endpoint, route = None, path, None
+        if path != '/connect/token':
+            client_id, _, rest = path[len('/api/v1/'):].partition('/') if path.startswith('/api/v1/') else ('', '', '')
+            endpoint = f'/{{client_id}}/{rest}'
+            route = ROUTES.get(rest)
+
+        with self._lock:
+            self.calls[endpoint] += 1
+        self._delay(endpoint)
+        headers = {}
+        try:
+            error = self._injected_error(endpoint)
+            if error:
+                raise error
+            if path == '/connect/token':
+                status, body = HTTPStatus.OK, self._connect_token(parse_qs(raw.decode()))
+            elif route is None:
+                raise FakeError(HTTPStatus.NOT_FOUND, f'Unknown endpoint {path}')
+            else:
+                request = json.loads(raw or b'{}')
+                with self._lock:
+                    status, body = HTTPStatus.OK, route(self, self.client(client_id), request, handler.headers)
+        except FakeError as e:
+            status, body, headers = e.status, {"message": e.message}, e.headers
+        except ValueError as e:
+            status, body = HTTPStatus.BAD_REQUEST, {"message": f'Invalid request body. {e}'}
+        except Exception as e:
+            logger.exception(f'Fake MDR server failed on {path}')
+            status, body = HTTPStatus.INTERNAL_SERVER_ERROR, {"message": str(e)}
+
+        data = json.dumps(body).encode()
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    """
+    -------------AUTH-------------
+    """
+
+    def _connect_token(self, form: dict) -> dict:
+        if not form.get('username') or not form.get('password'):
+            raise FakeError(HTTPStatus.BAD_REQUEST, 'invalid_grant')
+        expires_at = time.time() + self.token_ttl
+        token = unsigned_jwt({"sub": form['username'][0], "jti": uuid.uuid4().hex, "exp": int(expires_at)})
+        with self._lock:
+            self._uis_tokens[token] = expires_at
+        return {"access_token": token, "token_type": "Bearer", "expires_in": self.token_ttl}
+
+    @staticmethod
+    def _bearer(headers) -> str:
+        value = headers.get('Authorization') or ''
+        return value[len('Bearer '):] if value.startswith('Bearer ') else value
+
+    def _is_uis_token(self, token: str) -> bool:
+        """
+        False for other tokens, expired UIS token is rejected
+        """
+        expires_at = self._uis_tokens.get(token)
+        if expires_at is None:
+            return False
+        if expires_at < time.time():
+            raise FakeError(HTTPStatus.UNAUTHORIZED, 'UIS token is expired')
+        return True
+
+    def _require_uis(self, headers) -> None:
+        if not self._is_uis_token(self._bearer(headers)):
+            raise FakeError(HTTPStatus.UNAUTHORIZED, 'UIS token is not valid')
+
+    def _access_token(self, session: dict) -> str:
+        now = time.time()
+        session["issued_at"] = now
+        return unsigned_jwt({"sub": f'{session["client_id"]}+{session["session_id"]}',
+                             "exp": int(now + self.token_ttl), "iat": now})
+
+    def _session(self, client: FakeClient, headers) -> dict:
+        """
+        Session of a valid access token, UIS token opens the root tenant
+        """
+        token = self._bearer(headers)
+        if self._is_uis_token(token):
+            return {"session_id": None, "tenants": [{"tenant_id": ROOT_TENANT}], "client_id": client.client_id}
+
+        try:
+            claims = json.loads(base64.urlsafe_b64decode(token.split('.')[1] + '=='))
+            session_id = claims["sub"].split('+')[-1]
+        except (IndexError, KeyError, ValueError):
+            raise FakeError(HTTPStatus.UNAUTHORIZED, 'Access token is not valid')
+
+        session = self._sessions.get(session_id)
+        if session is None or session["client_id"] != client.client_id:
+            raise FakeError(HTTPStatus.UNAUTHORIZED, 'Session does not exist')
+        if claims["exp"] < time.time() or claims.get("iat", 0) < self._tokens_not_before:
+            raise FakeError(HTTPStatus.UNAUTHORIZED, 'Access token is expired')
+        return session
+
+    @staticmethod
+    def _tenant_ids(session: dict) -> Optional[set]:
+        """
+        Tenants visible to the session, None - all tenants
+        """
+        tenant_ids = {tenant["tenant_id"] for tenant in session["tenants"]}
+        return None if ROOT_TENANT in tenant_ids else tenant_ids
+
+    def robot_session_create(self, client: FakeClient, request: dict, headers) -> dict:
+        self._require_uis(headers)
+        session_id = str(uuid.uuid4())
+        session = {
+            "session_id": session_id,
+            "session_name": request.get("session_name", ''),
+            "role": request.get("role", "SUPERVISOR"),
+            "tenants": request.get("tenants") or [{"tenant_id": ROOT_TENANT}],
+            "client_id": client.client_id,
+            "refresh_token": uuid.uuid4().hex,
+        }
+        self._sessions[session_id] = session
+        return {"session_id": session_id, "refresh_token": session["refresh_token"]}
+
+    def session_confirm(self, client: FakeClient, request: dict, headers) -> dict:
+        for session in self._sessions.values():
+            if session["client_id"] == client.client_id and session["refresh_token"] == request.get("refresh_token"):
+                session["refresh_token"] = uuid.uuid4().hex
+                return {"refresh_token": session["refresh_token"], "access_token": self._access_token(session)}
+        raise FakeError(HTTPStatus.UNAUTHORIZED, 'Refresh token is not valid')
+
+    def session_restart(self, client: FakeClient, request: dict, headers) -> dict:
+        session = self._session(client, headers)
+        session["refresh_token"] = uuid.uuid4().hex
+        return {"refresh_token": session["refresh_token"]}
+
+    def robot_sessions_list(self, client: FakeClient, request: dict, headers) -> List[dict]:
+        self._session(client, headers)
+        return [{key: session[key] for key in ("session_id", "session_name", "role", "tenants")}
+                for session in self._sessions.values() if session["client_id"] == client.client_id]
+
+    def robot_sessions_delete(self, client: FakeClient, request: dict, headers) -> dict:
+        self._session(client, headers)
+        if self._sessions.pop(request.get("session_id"), None) is None:
+            raise FakeError(HTTPStatus.NOT_FOUND, 'Session does not exist')
+        return {}
+
+    """
+    -------------ASSETS-------------
+    """
+
+    def _assets(self, client: FakeClient, session: dict, request: dict) -> List[dict]:
+        tenant_ids = self._tenant_ids(session)
+        tenant_names = None if tenant_ids is None else \
+            {client.tenants[tenant_id]["tenant_name"] for tenant_id in tenant_ids if tenant_id in client.tenants}
+        host_names = set(request.get("host_names") or ())
+        return [asset for asset in client.assets.values()
+                if (tenant_names is None or asset["tenant_name"] in tenant_names)
+                and (not host_names or asset["host_name"] in host_names)]
+
+    @staticmethod
+    def _project(item: dict, fields: Optional[List[str]]) -> dict:
+        return {field: item[field] for field in fields if field in item} if fields else dict(item)
+
+    @staticmethod
+    def _page(items: list, request: dict, default_size: int = 100) -> list:
+        page_size = request.get("page_size") or default_size
+        page = request.get("page") or 1
+        return items[(page - 1) * page_size:page * page_size]
+
+    def assets_count(self, client: FakeClient, request: dict, headers) -> dict:
+        return {"count": len(self._assets(client, self._session(client, headers), request))}
+
+    def assets_list(self, client: FakeClient, request: dict, headers) -> List[dict]:
+        assets = self._page(self._assets(client, self._session(client, headers), request), request)
+        return [self._project(asset, request.get("fields")) for asset in assets]
+
+    def assets_details(self, client: FakeClient, request: dict, headers) -> dict:
+        self._session(client, headers)
+        asset = client.assets.get(request.get("asset_id"))
+        if asset is None:
+            raise FakeError(HTTPStatus.NOT_FOUND, 'Asset does not exist')
+        return self._project(asset, request.get("fields"))
+
+    def assets_suggestion(self, client: FakeClient, request: dict, headers) -> List[str]:
+        phrase = (request.get("search_phrase") or '').upper()
+        assets = self._assets(client, self._session(client, headers), {})
+        return sorted({asset["host_name"] for asset in assets if phrase in asset["host_name"].upper()})[:100]
+
+    """
+    -------------INCIDENTS-------------
+    """
+
+    def _incidents(self, client: FakeClient, session: dict, request: dict) -> List[dict]:
+        tenant_ids = self._tenant_ids(session)
+        tenant_names = None if tenant_ids is None else \
+            {client.tenants[tenant_id]["tenant_name"] for tenant_id in tenant_ids if tenant_id in client.tenants}
+        phrase = str(request.get("search_phrase") or '')
+        incidents = [incident for incident in client.incidents.values()
+                     if (tenant_names is None or incident["tenant_name"] in tenant_names)
+                     and (not phrase or phrase == str(incident["incident_number"]) or phrase in incident["summary"])]
+        return sorted(incidents, key=lambda incident: incident["creation_time"], reverse=True)
+
+    def _incident(self, client: FakeClient, incident_id: str) -> dict:
+        incident = client.incidents.get(incident_id)
+        if incident is None:
+            raise FakeError(HTTPStatus.NOT_FOUND, f'Incident {incident_id} does not exist')
+        return incident
+
+    def incidents_create(self, client: FakeClient, request: dict, headers) -> dict:
+        session = self._session(client, headers)
+        return dict(client.add_incident(request, session["session_id"]))
+
+    def incidents_count(self, client: FakeClient, request: dict, headers) -> dict:
+        return {"count": len(self._incidents(client, self._session(client, headers), request))}
+
+    def incidents_list(self, client: FakeClient, request: dict, headers) -> List[dict]:
+        incidents = self._page(self._incidents(client, self._session(client, headers), request), request)
+        return [self._project(incident, request.get("fields")) for incident in incidents]
+
+    def incidents_details(self, client: FakeClient, request: dict, headers) -> dict:
+        self._session(client, headers)
+        return self._project(self._incident(client, request.get("incident_id")), request.get("fields"))
+
+    def incidents_close(self, client: FakeClient, request: dict, headers) -> dict:
+        session = self._session(client, headers)
+        incident = self._incident(client, request.get("incident_id"))
+        incident.update({
+            "status": "Closed",
+            "resolution": RESOLUTIONS.get(request.get("resolution_status"), request.get("resolution_status")),
+            "status_description": request.get("summary", ''),
+            "update_time": client.record_time(),
+        })
+        client.add_history("update", "incident_details", incident, session["session_id"],
+                           record_time=incident["update_time"])
+        return dict(incident)
+
+    def incidents_history(self, client: FakeClient, request: dict, headers) -> List[dict]:
+        """
+        Every entity index is paginated separately with entity_type_page_size, like the real portal does
+        """
+        session = self._session(client, headers)
+        incident_id = request.get("incident_id")
+        min_time, max_time = request.get("min_record_time"), request.get("max_record_time")
+        by_kind = {}
+        for record in client.history:
+            entity = next(iter(record["entity"].values()))
+            if incident_id and entity.get("incident_id") != incident_id:
+                continue
+            if min_time is not None and record["record_time"] < min_time:
+                continue
+            if max_time is not None and record["record_time"] > max_time:
+                continue
+            if request.get("ignore_self") and record["_session_id"] == session["session_id"]:
+                continue
+            by_kind.setdefault(next(iter(record["entity"])), []).append(record)
+
+        page_request = {"page": request.get("page"), "page_size": request.get("entity_type_page_size")}
+        records = [record for kind_records in by_kind.values() for record in self._page(kind_records, page_request)]
+        records.sort(key=lambda record: record["record_time"])
+        return [{key: value for key, value in record.items() if not key.startswith('_')} for record in records]
+
+    def incidents_send_email(self, client: FakeClient, request: dict, headers) -> dict:
+        self._session(client, headers)
+        return {}
+
+    def incidents_sla_count(self, client: FakeClient, request: dict, headers) -> dict:
+        self._session(client, headers)
+        return {"limit": 3, "count": 0}
+
+    """
+    -------------COMMENTS-------------
+    """
+
+    def comments_create(self, client: FakeClient, request: dict, headers) -> dict:
+        session = self._session(client, headers)
+        incident = self._incident(client, request.get("incident_id"))
+        creation_time = client.record_time()
+        comment = {
+            "comment_id": uuid.UUID(int=client.rnd.getrandbits(128)).hex,
+            "incident_id": incident["incident_id"],
+            "text": request.get("text", ''),
+            "author_name": session.get("session_name") or 'robot',
+            "creation_time": creation_time,
+        }
+        client.comments[comment["comment_id"]] = comment
+        client.add_history("create", "incident_comment", comment, session["session_id"], record_time=creation_time)
+
+        incident["update_time"] = client.record_time()
+        client.add_history("update", "incident_details", incident, session["session_id"],
+                           record_time=incident["update_time"])
+        return dict(comment)
+
+    def comments_delete(self, client: FakeClient, request: dict, headers) -> dict:
+        session = self._session(client, headers)
+        comment = client.comments.pop(request.get("comment_id"), None)
+        if comment is None:
+            raise FakeError(HTTPStatus.NOT_FOUND, 'Comment does not exist')
+        client.add_history("delete", "incident_comment", comment, session["session_id"])
+        return {}
+
+    """
+    -------------TENANTS, SCHEDULES, SETTINGS, ORGANIZATIONS-------------
+    """
+
+    def tenants_list(self, client: FakeClient, request: dict, headers) -> List[dict]:
+        self._session(client, headers)
+        return [dict(tenant) for tenant in client.tenants.values() if tenant["tenant_id"] != ROOT_TENANT]
+
+    def tenants_create(self, client: FakeClient, request: dict, headers) -> dict:
+        self._session(client, headers)
+        tenant = {"tenant_id": str(uuid.uuid4()), "tenant_name": request.get("tenant_name", '')}
+        client.tenants[tenant["tenant_id"]] = tenant
+        return dict(tenant)
+
+    def tenants_delete(self, client: FakeClient, request: dict, headers) -> dict:
+        session = self._session(client, headers)
+        tenant_id = request.get("tenant_id")
+        tenant_ids = self._tenant_ids(session)
+        if tenant_ids is None or tenant_id not in tenant_ids:
+            raise FakeError(HTTPStatus.FORBIDDEN, f'Session has no access to tenant {tenant_id}')
+        if client.tenants.pop(tenant_id, None) is None:
+            raise FakeError(HTTPStatus.NOT_FOUND, f'Tenant {tenant_id} does not exist')
+        return {}
+
+    def schedules_list(self, client: FakeClient, request: dict, headers) -> List[dict]:
+        self._session(client, headers)
+        return [dict(schedule) for schedule in client.schedules]
+
+    def schedules_create(self, client: FakeClient, request: dict, headers) -> dict:
+        self._session(client, headers)
+        client.schedules = [schedule for schedule in client.schedules if schedule.get("type") != request.get("type")]
+        client.schedules.append(dict(request))
+        return dict(request)
+
+    def schedules_delete(self, client: FakeClient, request: dict, headers) -> dict:
+        self._session(client, headers)
+        client.schedules = [schedule for schedule in client.schedules if schedule.get("type") != request.get("type")]
+        return {}
+
+    def settings_auto_response_get(self, client: FakeClient, request: dict, headers) -> dict:
+        self._session(client, headers)
+        return {"auto_response": client.auto_response}
+
+    def settings_auto_response_set(self, client: FakeClient, request: dict, headers) -> dict:
+        self._session(client, headers)
+        client.auto_response = bool(request.get("auto_response"))
+        return {}
+
+    def organizations_delete(self, client: FakeClient, request: dict, headers) -> dict:
+        self._session(client, headers)
+        self._clients[client.client_id] = FakeClient(client.client_id, self.seed, 0, 0, 0)
+        return {}
+
+
+ROUTES = {
+    "robot_session/create": FakeMDRServer.robot_session_create,
+    "session/confirm": FakeMDRServer.session_confirm,
+    "session/restart": FakeMDRServer.session_restart,
+    "robot_sessions/list": FakeMDRServer.robot_sessions_list,
+    "robot_sessions/delete": FakeMDRServer.robot_sessions_delete,
+    "assets/count": FakeMDRServer.assets_count,
+    "assets/list": FakeMDRServer.assets_list,
+    "assets/details": FakeMDRServer.assets_details,
+    "assets/suggestion": FakeMDRServer.assets_suggestion,
+    "incidents/create": FakeMDRServer.incidents_create,
+    "incidents/count": FakeMDRServer.incidents_count,
+    "incidents/list": FakeMDRServer.incidents_list,
+    "incidents/details": FakeMDRServer.incidents_details,
+    "incidents/close": FakeMDRServer.incidents_close,
+    "incidents/history": FakeMDRServer.incidents_history,
+    "incidents/send/email": FakeMDRServer.incidents_send_email,
+    "incidents/sla_count": FakeMDRServer.incidents_sla_count,
+    "comments/create": FakeMDRServer.comments_create,
+    "comments/delete": FakeMDRServer.comments_delete,
+    "tenants/list": FakeMDRServer.tenants_list,
+    "tenants/create": FakeMDRServer.tenants_create,
+    "tenants/delete": FakeMDRServer.tenants_delete,
+    "schedules/list": FakeMDRServer.schedules_list,
+    "schedules/create": FakeMDRServer.schedules_create,
+    "schedules/delete": FakeMDRServer.schedules_delete,
+    "settings/auto_response/get": FakeMDRServer.settings_auto_response_get,
+    "settings/auto_response/set": FakeMDRServer.settings_auto_response_set,
+    "organizations/delete": FakeMDRServer.organizations_delete,
+}
@@ -0,0 +1,83 @@
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger()
+
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP connections shared by Auth, MDRRestAPi and all its wrappers.
+    One HTTPAdapter is mounted into every session, so all of them reuse the same urllib3 pools
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 32, retries: int = 3,
+                 backoff_factor: float = 0.1, pool_block: bool = False):
+        """
+        param: pool_connections: number of hosts which connection pools are kept
+        param: pool_maxsize: max keep-alive connections per host
+        param: retries: retries of requests failed to connect (refused connection, connect timeout)
+        param: pool_block: wait for a free connection instead of opening one above pool_maxsize
+        """
+        # MDR API methods are POST, and creates are not idempotent: a request which may have reached
+        # the server (read error) is never resent here, only the ones which failed to connect.
+        # Status codes are not retried here either, it is a job of the API layer
+        max_retries = Retry(total=retries, connect=retries, read=0, status=0, other=0,
+                            backoff_factor=backoff_factor, raise_on_status=False)
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                   max_retries=max_retries, pool_block=pool_block)
+        self.session = self.mount(requests.Session())
+
+    def mount(self, session: requests.Session) -> requests.Session:
+        session.mount('http://', self.adapter)
+        session.mount('https://', self.adapter)
+        return session
+
+    def attach(self, client) -> None:
+        """
+        Make HttpClient based client send requests through the shared adapter
+        """
+        session = getattr(client, 'session', None)
+        if isinstance(session, requests.Session):
+            self.mount(session)
+        else:
+            logger.warning(f'{type(client).__name__} has no requests session, connection pool was not attached')
+
+    def stats(self) -> dict:
+        hosts = connections = requests_count = idle = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts += 1
+            connections += pool.num_connections
+            requests_count += pool.num_requests
+            idle += pool.pool.qsize() if pool.pool else 0
+
+        return {
+            "hosts": hosts,
+            "connections_opened": connections,
+            "requests": requests_count,
+            "reused_connection_requests": max(requests_count - connections, 0),
+            "idle_connections": idle,
+        }
+
+    def close(self) -> None:
+        self.session.close()
+        self.adapter.close()
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> ConnectionPool:
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ConnectionPool()
+        return _default_pool
@@ -1,6 +1,7 @@
 from http import HTTPStatus
 
 from ..decorators import for_all_methods, token_update
+from .models import HistoryRecord, Incident
 
 
 @for_all_methods(token_update)
@@ -9,10 +10,10 @@ class Incidents:
         self.mdr_api = mdr_api
 
     def create(self, body: dict):
-        response = self.mdr_api.post(f"/{self.client_id}/incidents/create", json=body)
+        response = self.mdr_api.post(f"/{self.client_id}/incidents/create", json=body, idempotent=False)
         assert response.status_code == HTTPStatus.OK, \
             f"Incident has not been created. SC: {response.status_code}. Msg: {response.text}"
-        return response.json()
+        return self.mdr_api.decode(response, Incident)
 
     @property
     def client_id(self):
@@ -30,7 +31,7 @@ class Incidents:
         response = self.mdr_api.post(f"/{self.client_id}/incidents/details", json=body)
         assert response.status_code == HTTPStatus.OK, \
             f"Details has not been received. SC: {response.status_code}. Msg: {response.text}"
-        return response.json()
+        return self.mdr_api.decode(response, Incident)
 
     def get_incidents(self, page_size: int, page_number: int, additional_body: dict = None):
         body = {
@@ -43,19 +44,19 @@ class Incidents:
         response = self.mdr_api.post(f'/{self.client_id}/incidents/list', json=body)
         assert response.status_code == HTTPStatus.OK, \
             f"Assets list has not been received, return code {response.status_code}"
-        return response.json()
+        return self.mdr_api.decode(response, Incident)
 
     def close(self, body):
         response = self.mdr_api.post(f'/{self.client_id}/incidents/close', json=body)
         assert response.status_code == HTTPStatus.OK, \
             f"Incident has not been closed. SC: {response.status_code}. Msg: {response.text}"
-        return response.json()
+        return self.mdr_api.decode(response, Incident)
 
     def history(self, body):
         response = self.mdr_api.post(f'/{self.client_id}/incidents/history', json=body)
         assert response.status_code == HTTPStatus.OK, \
             f"History has not been received. SC: {response.status_code}. Msg: {response.text}"
-        return response.json()
+        return self.mdr_api.decode(response, HistoryRecord)
 
     def send_email(self, body):
         response = self.mdr_api.post(f'/{self.client_id}/incidents/send/email', json=body)
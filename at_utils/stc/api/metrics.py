@@ -0,0 +1,180 @@
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger()
+
+# upper bounds of latency buckets, seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class LatencyHistogram:
+    """
+    Latencies of one endpoint: counts per bucket, percentiles are estimated from the counts,
+    so memory and cost of add do not grow with the number of requests
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = None
+
+    def add(self, latency: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, latency)] += 1
+        self.count += 1
+        self.total += latency
+        if self.max is None or latency > self.max:
+            self.max = latency
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Nearest rank percentile interpolated linearly inside its bucket, never above the max latency
+        """
+        if not self.count:
+            return None
+        rank = min(max(math.ceil(q / 100 * self.count), 1), self.count)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank:
+                break
+            seen += count
+
+        lower = self.buckets[index - 1] if index else 0.0
+        upper = self.buckets[index] if index < len(self.buckets) else self.max
+        upper = min(upper, self.max)
+        return lower + (upper - lower) * (rank - seen) / count if upper > lower else upper
+
+    def to_dict(self) -> dict:
+        bounds = [str(bound) for bound in self.buckets] + ['inf']
+        return {
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+            "total": self.total,
+            "buckets": dict(zip(bounds, self.counts)),
+        }
+
+
+class EndpointStats:
+    """
+    Counters of one endpoint template
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.statuses = Counter()
+        self.latency = LatencyHistogram()
+
+    def to_dict(self) -> dict:
+        statuses = sorted(self.statuses.items(), key=lambda item: str(item[0]))
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "statuses": {str(status): count for status, count in statuses},
+            "latency": self.latency.to_dict(),
+        }
+
+
+def response_sizes(response) -> Tuple[int, int]:
+    """
+    Sizes of request body and response body in bytes
+    """
+    request = getattr(response, 'request', None)
+    body = getattr(request, 'body', None) or b''
+    content = getattr(response, 'content', None) or b''
+    return len(body), len(content)
+
+
+class ApiMetrics:
+    """
+    Thread safe per endpoint statistics of MDR API requests.
+    Every attempt of a request is recorded, retries are counted separately.
+    Listeners are called with endpoint and sample dict after every recorded attempt:
+        {"latency": float, "status": int or None, "bytes_in": int, "bytes_out": int, "error": str or None}
+    """
+    ENV = 'MDR_API_METRICS'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.listeners: List[Callable[[str, dict], None]] = []
+
+    def _stats(self, endpoint: str) -> EndpointStats:
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats()
+        return stats
+
+    def record(self, endpoint: str, latency: float, response=None, error: BaseException = None) -> None:
+        """
+        Record one attempt: its response or the exception raised instead of it
+        """
+        bytes_out, bytes_in = response_sizes(response) if response is not None else (0, 0)
+        status = getattr(response, 'status_code', None)
+        with self._lock:
+            stats = self._stats(endpoint)
+            stats.requests += 1
+            stats.bytes_in += bytes_in
+            stats.bytes_out += bytes_out
+            stats.latency.add(latency)
+            if error is not None:
+                stats.errors += 1
+                stats.statuses[type(error).__name__] += 1
+            else:
+                stats.statuses[status] += 1
+            listeners = list(self.listeners)
+
+        sample = {"latency": latency, "status": status, "bytes_in": bytes_in, "bytes_out": bytes_out,
+                  "error": type(error).__name__ if error is not None else None}
+        for listener in listeners:
+            listener(endpoint, sample)
+
+    def record_retry(self, endpoint: str) -> None:
+        with self._lock:
+            self._stats(endpoint).retries += 1
+
+    def add_listener(self, listener: Callable[[str, dict], None]) -> None:
+        with self._lock:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, dict], None]) -> None:
+        with self._lock:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {endpoint: stats.to_dict() for endpoint, stats in sorted(self.endpoints.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.endpoints = {}
+
+    def dump(self, path: str) -> None:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        logger.info(f'MDR API metrics were saved to {path}')
+
+
+_default_metrics = ApiMetrics()
+
+
+def get_default_metrics() -> ApiMetrics:
+    return _default_metrics
@@ -0,0 +1,110 @@
+import json
+from collections.abc import Mapping
+from typing import Iterator, List, Type, Union
+
+
+class Record(Mapping):
+    """
+    Read-only record with dict-style access: record["host_name"], record.get("status"), dict(record).
+    Known fields are stored in slots, so a record takes several times less memory than a dict.
+    Fields missing in the response (fields projection) are missing in the record as well,
+    unknown fields are kept in a small dict
+    """
+    __slots__ = ('_extra',)
+    _fields = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = frozenset(cls.__slots__)
+
+    def __init__(self, data: dict):
+        extra = None
+        for key, value in data.items():
+            if key in self._fields:
+                setattr(self, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        self._extra = extra
+
+    def __getitem__(self, key: str):
+        if key in self._fields:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        if key in self._fields:
+            return hasattr(self, key)
+        return bool(self._extra) and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for field in self.__slots__:
+            if hasattr(self, field):
+                yield field
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({dict(self)!r})'
+
+    def to_dict(self) -> dict:
+        return dict(self)
+
+
+class Asset(Record):
+    __slots__ = ('asset_id', 'host_name', 'first_seen', 'last_seen', 'installed_product_info', 'ksc_host_id',
+                 'isolation', 'status', 'os_version', 'product_map', 'tenant_name')
+
+
+class Incident(Record):
+    __slots__ = ('incident_id', 'summary', 'priority', 'status', 'resolution', 'affected_hosts',
+                 'affected_hosts_mappings', 'host_based_iocs', 'network_based_iocs', 'detection_technology',
+                 'creation_time', 'update_time', 'attack_stage', 'mitre_tactics', 'mitre_techniques', 'description',
+                 'incident_number', 'client_description', 'status_description', 'origin', 'attachments', 'comments',
+                 'iocs', 'responses', 'tenant_name', 'was_read')
+
+
+class Comment(Record):
+    __slots__ = ('comment_id', 'incident_id', 'text', 'author_name', 'creation_time', 'update_time')
+
+
+class HistoryRecord(Record):
+    __slots__ = ('operation', 'record_time', 'entity')
+
+
+class Tenant(Record):
+    __slots__ = ('tenant_id', 'tenant_name')
+
+
+class Session(Record):
+    __slots__ = ('session_id', 'session_name', 'role', 'tenants')
+
+
+def plain(value):
+    """
+    Copy of JSON request body with records converted to dicts, json encoder does not accept records
+    """
+    if isinstance(value, Mapping):
+        return {key: plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain(item) for item in value]
+    return value
+
+
+def decode(body: Union[bytes, str], model: Type[Record]) -> Union[Record, List[Record]]:
+    """
+    Decode JSON response body into a record or a list of records
+    """
+    data = json.loads(body)
+    if isinstance(data, list):
+        return [model(item) for item in data]
+    return model(data)
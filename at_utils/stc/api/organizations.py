@@ -1,6 +1,6 @@
 from http import HTTPStatus
 from ..decorators import for_all_methods, token_update
-from at_utils import retry_wrapper
+from .retry import RetryPolicy
 
 
 @for_all_methods(token_update)
@@ -12,7 +12,9 @@ class Organizations:
     def client_id(self):
         return self.mdr_api.auth.client_id
 
-    @retry_wrapper(exception=AssertionError, n_tries=20, delay=6)
+    # deletion of a client can take up to two minutes
+    delete_retry_policy = RetryPolicy(max_attempts=20, base_delay=1, max_delay=12, deadline=120)
+
     def delete(self):
         """
         Will delete all info about client from portal if it's name match regexp
@@ -20,7 +22,8 @@ class Organizations:
         # uis_token is a Secret
         response = self.mdr_api.post(f'/{self.client_id}/organizations/delete',
                                      json={},
-                                     headers={"Authorization": f"Bearer {self.mdr_api.auth.uis_token.value}"})
+                                     headers={"Authorization": f"Bearer {self.mdr_api.auth.uis_token.value}"},
+                                     retry_policy=self.delete_retry_policy)
 
         assert response.status_code == HTTPStatus.OK, \
             f"Client was not deleted. SC: {response.status_code}. Msg: {response.text}"
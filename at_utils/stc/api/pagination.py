@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional
+
+# pages are not retried here, MDRRestAPi.post has already retried 429, 5xx and connection errors
+FetchPage = Callable[[int], list]
+
+
+def fetch_pages(fetch_page: FetchPage, pages: Iterable[int], concurrency: int = 8) -> List[list]:
+    """
+    Fetch pages with bounded thread pool
+    :return: list of pages in the order of pages argument
+    """
+    pages = list(pages)
+    if concurrency <= 1 or len(pages) <= 1:
+        return [fetch_page(page) for page in pages]
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(pages)), thread_name_prefix='mdr_page') as executor:
+        futures = [executor.submit(fetch_page, page) for page in pages]
+        return [future.result() for future in futures]
+
+
+def fetch_all(fetch_page: FetchPage, page_size: int, pages_count: int, concurrency: int = 8,
+              max_page: Optional[int] = None) -> list:
+    """
+    Fetch pages_count pages (usually ceil(count / page_size)) in parallel and flatten them.
+    If the last page is full, the listing has grown since count was taken and remaining pages
+    are fetched one by one until the first short page or max_page
+    """
+    pages_count = max(pages_count, 1)
+    if max_page is not None:
+        pages_count = min(pages_count, max_page)
+
+    result = []
+    last_page = []
+    for last_page in fetch_pages(fetch_page, range(1, pages_count + 1), concurrency):
+        result.extend(last_page)
+
+    page_number = pages_count + 1
+    while len(last_page) >= page_size and (max_page is None or page_number <= max_page):
+        last_page = fetch_page(page_number)
+        result.extend(last_page)
+        page_number += 1
+
+    return result
+
+
+def iter_pages(fetch_page: FetchPage, page_size: int, max_page: Optional[int] = None,
+               prefetch: bool = True) -> Iterator:
+    """
+    Yield items page by page until the first short page or max_page.
+    With prefetch the next page is requested in background while the current one is consumed,
+    so at most two pages are held in memory
+    """
+    def has_next(number, page):
+        return len(page) >= page_size and (max_page is None or number < max_page)
+
+    if max_page is not None and max_page < 1:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mdr_prefetch') if prefetch else None
+    try:
+        page_number = 1
+        page = fetch_page(page_number)
+        while True:
+            more = has_next(page_number, page)
+            next_page = None
+            if more and executor:
+                next_page = executor.submit(fetch_page, page_number + 1)
+
+            yield from page
+
+            if not more:
+                return
+            page_number += 1
+            if next_page:
+                page = next_page.result()
+            else:
+                page = fetch_page(page_number)
+    finally:
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,150 @@
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import pytest
+
+from .metrics import ApiMetrics, get_default_metrics
+
+BUDGET_ENV = 'MDR_API_BUDGET'
+
+
+def metrics_path() -> str:
+    """
+    MDR_API_METRICS=<path>, every pytest-xdist worker writes its own <path>.<worker id>
+    """
+    path = os.environ.get(ApiMetrics.ENV)
+    worker = os.environ.get('PYTEST_XDIST_WORKER')
+    return f'{path}.{worker}' if path and worker else path
+
+
+class ApiCost:
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+        self.api_time = 0.0
+
+    def add(self, sample: dict) -> None:
+        self.calls += 1
+        self.bytes += sample["bytes_in"] + sample["bytes_out"]
+        self.api_time += sample["latency"]
+
+
+class ApiCostTracker:
+    """
+    Metrics listener attributing MDR API calls to the running test and to the fixture being set up.
+    Tests run one by one, so calls of worker threads started by the test belong to it as well
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tests: Dict[str, ApiCost] = defaultdict(ApiCost)
+        self.fixtures: Dict[str, ApiCost] = defaultdict(ApiCost)
+        self.test: Optional[str] = None
+        self.fixture_stack: List[str] = []
+
+    def __call__(self, endpoint: str, sample: dict) -> None:
+        with self._lock:
+            if self.test:
+                self.tests[self.test].add(sample)
+            if self.fixture_stack:
+                self.fixtures[self.fixture_stack[-1]].add(sample)
+
+    def calls(self, nodeid: str) -> int:
+        with self._lock:
+            return self.tests[nodeid].calls if nodeid in self.tests else 0
+
+    @staticmethod
+    def _table(title: str, costs: Dict[str, ApiCost]) -> List[str]:
+        rows = sorted(((name, cost) for name, cost in costs.items() if cost.calls),
+                      key=lambda row: row[1].api_time, reverse=True)
+        if not rows:
+            return []
+        width = max(len(title), *(len(name) for name, _ in rows))
+        lines = [f'{title:<{width}}  {"calls":>7}  {"bytes":>12}  {"api time, s":>11}']
+        lines += [f'{name:<{width}}  {cost.calls:>7}  {cost.bytes:>12}  {cost.api_time:>11.2f}' for name, cost in rows]
+        return lines
+
+    def report(self) -> List[str]:
+        with self._lock:
+            tests, fixtures = dict(self.tests), dict(self.fixtures)
+        lines = self._table('test', tests)
+        fixture_lines = self._table('fixture', fixtures)
+        return lines + [''] + fixture_lines if lines and fixture_lines else lines + fixture_lines
+
+
+tracker = ApiCostTracker()
+# MDR API calls of the test body, from pytest_runtest_call to its report
+body_calls: Dict[str, int] = {}
+
+
+def api_budget(item) -> Optional[int]:
+    """
+    Max MDR API calls of the test body: api_budget marker or MDR_API_BUDGET
+    """
+    marker = item.get_closest_marker('api_budget')
+    if marker:
+        return marker.args[0]
+    budget = os.environ.get(BUDGET_ENV)
+    return int(budget) if budget else None
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'api_budget(calls): fail the test if its body makes more MDR API calls')
+    metrics = get_default_metrics()
+    if tracker not in metrics.listeners:
+        metrics.add_listener(tracker)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    tracker.test = item.nodeid
+    yield
+    tracker.test = None
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    tracker.fixture_stack.append(fixturedef.argname)
+    try:
+        yield
+    finally:
+        tracker.fixture_stack.pop()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    calls_before = tracker.calls(item.nodeid)
+    yield
+    body_calls[item.nodeid] = tracker.calls(item.nodeid) - calls_before
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    if call.when != 'call':
+        return
+
+    report = outcome.get_result()
+    budget = api_budget(item)
+    calls = body_calls.pop(item.nodeid, 0)
+    if budget is not None and report.passed and calls > budget:
+        # the report is changed instead of the call result, so any pluggy version is fine
+        report.outcome = 'failed'
+        report.longrepr = f'{item.nodeid} made {calls} MDR API calls, budget is {budget}'
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    lines = tracker.report()
+    if not lines:
+        return
+    terminalreporter.section('MDR API cost')
+    for line in lines:
+        terminalreporter.write_line(line)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    path = metrics_path()
+    if path:
+        get_default_metrics().dump(path)
@@ -0,0 +1,99 @@
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Dict, List, Optional
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket: rate requests per second on average, bursts up to burst requests
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """
+        Take a token or return seconds to wait for it
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> None:
+        wait = self._reserve()
+        while wait:
+            time.sleep(wait)
+            wait = self._reserve()
+
+
+class EndpointLimit:
+    """
+    Rate and in-flight limits of one endpoint path prefix
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None,
+                 max_in_flight: Optional[int] = None):
+        """
+        param: rate: requests per second
+        param: burst: requests allowed at once after idle time, rate by default
+        param: max_in_flight: requests sent at the same time
+        """
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.in_flight = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+
+    @contextmanager
+    def slot(self):
+        if self.bucket:
+            self.bucket.acquire()
+        if self.in_flight:
+            self.in_flight.acquire()
+        try:
+            yield
+        finally:
+            if self.in_flight:
+                self.in_flight.release()
+
+
+class RateLimiter:
+    """
+    Client side limits per endpoint path prefix, shared by all threads using the limiter.
+    Prefixes are matched against the path without client id, every matching prefix is applied:
+        RateLimiter({
+            "": {"max_in_flight": 32},                      # all requests
+            "/assets/list": {"rate": 5, "burst": 10},
+            "/incidents/": {"rate": 20, "max_in_flight": 8},
+        })
+    """
+
+    def __init__(self, limits: Dict[str, dict] = None):
+        self.limits = {prefix: EndpointLimit(**limit) for prefix, limit in (limits or {}).items()}
+        # shortest prefix first: limits are always acquired in the same order
+        self._prefixes = sorted(self.limits, key=len)
+
+    @staticmethod
+    def _path(endpoint: str) -> str:
+        return endpoint[len('/{client_id}'):] if endpoint.startswith('/{client_id}') else endpoint
+
+    def limits_for(self, endpoint: str) -> List[EndpointLimit]:
+        path = self._path(endpoint)
+        return [self.limits[prefix] for prefix in self._prefixes if path.startswith(prefix)]
+
+    @contextmanager
+    def slot(self, endpoint: str):
+        """
+        Wait until the request to endpoint template (/{client_id}/assets/list) is allowed
+        """
+        with ExitStack() as stack:
+            for limit in self.limits_for(endpoint):
+                stack.enter_context(limit.slot())
+            yield
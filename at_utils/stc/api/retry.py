@@ -0,0 +1,118 @@
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+from typing import Callable, Optional, Tuple, Type
+
+import requests
+
+logger = logging.getLogger()
+
+RETRY_STATUSES = frozenset({HTTPStatus.TOO_MANY_REQUESTS} | {status for status in HTTPStatus if status >= 500})
+RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout)
+# the server did not process the request, so it is safe to resend even a create
+NOT_PROCESSED_STATUSES = frozenset({HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE})
+
+
+class RetryPolicy:
+    """
+    Retry of MDR API requests: exponential backoff with full jitter, Retry-After support and a total deadline.
+    429 and 5xx responses and connection errors are retried, any other response is returned at once
+    """
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 0.5, max_delay: float = 30,
+                 deadline: Optional[float] = 60, retry_statuses=RETRY_STATUSES,
+                 retry_exceptions: Tuple[Type[BaseException], ...] = RETRY_EXCEPTIONS):
+        """
+        param: max_attempts: attempts including the first one
+        param: base_delay: backoff of the first retry, doubled for every next one
+        param: max_delay: upper bound of one delay
+        param: deadline: seconds since the first attempt after which nothing is retried, None - no deadline
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_exceptions = retry_exceptions
+
+    def non_idempotent(self) -> 'RetryPolicy':
+        """
+        The same policy for requests which must not be sent twice (creates): connection errors, timeouts
+        and 5xx may come after the server has processed the request, only 429 and 503 are retried
+        """
+        return RetryPolicy(max_attempts=self.max_attempts, base_delay=self.base_delay, max_delay=self.max_delay,
+                           deadline=self.deadline, retry_statuses=self.retry_statuses & NOT_PROCESSED_STATUSES,
+                           retry_exceptions=())
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Full jitter: random delay between 0 and exponential backoff of the attempt
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    @staticmethod
+    def retry_after(response: requests.Response) -> Optional[float]:
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+        except (TypeError, ValueError):
+            return None
+
+    def is_retryable(self, response: requests.Response) -> bool:
+        return response.status_code in self.retry_statuses
+
+    def _delay(self, attempt: int, started: float, response: requests.Response = None) -> Optional[float]:
+        """
+        Delay before the next attempt or None if retries are over
+        """
+        if attempt + 1 >= self.max_attempts:
+            return None
+
+        delay = self.retry_after(response) if response is not None else None
+        if delay is None:
+            delay = self.backoff(attempt)
+        if self.deadline is not None and time.monotonic() - started + delay > self.deadline:
+            return None
+        return min(delay, self.max_delay)
+
+    def send(self, request: Callable[[], requests.Response],
+             on_retry: Callable[[int, str], None] = None) -> requests.Response:
+        """
+        Call request until its response is not retryable or retries are over
+        param: on_retry: called with attempt number and reason before every retry
+        :return: the last response
+        """
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                response = request()
+            except self.retry_exceptions as e:
+                delay = self._delay(attempt, started)
+                if delay is None:
+                    raise
+                reason = type(e).__name__
+            else:
+                if not self.is_retryable(response):
+                    return response
+                delay = self._delay(attempt, started, response)
+                if delay is None:
+                    return response
+                reason = f'SC {response.status_code}'
+
+            attempt += 1
+            logger.warning(f'Request is retried in {delay:.2f}s, attempt {attempt + 1}/{self.max_attempts}: {reason}')
+            if on_retry:
+                on_retry(attempt, reason)
+            time.sleep(delay)
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
@@ -1,38 +1,83 @@
 from http import HTTPStatus
 
 from ..decorators import for_all_methods, token_update
+from .cache import TTLCache
 
 
 @for_all_methods(token_update)
 class Schedules:
+    # seconds the schedule list is reused, None - until force_refresh()
+    state_ttl = 60
+
     def __init__(self, mdr_api):
         self.mdr_api = mdr_api
+        self._state = TTLCache(self.state_ttl)
 
     @property
     def client_id(self):
         return self.mdr_api.auth.client_id
 
-    def delete(self):
+    def force_refresh(self):
+        """
+        Drop cached schedules, the next read goes to the portal
+        """
+        self._state.invalidate()
+
+    def _update_cached(self, update):
+        """
+        Write-through: update cached list only if it is cached, otherwise the next get loads it
+        """
+        schedules = self._state.get(self.client_id)
+        if schedules is not None:
+            self._state.set(self.client_id, update(schedules))
+
+    def delete(self, force_refresh: bool = False):
+        """
+        Delete weekly schedule, nothing is sent if the schedule list has no weekly schedule
+        param: force_refresh: request schedule list from the portal instead of the cached one
+        :return: schedules/delete response, {} like the portal answers if nothing was sent
+        """
+        if 'weekly' not in [schedule['type'] for schedule in self.get(force_refresh=force_refresh)]:
+            return {}
+
         # uis_token is a Secret
         response = self.mdr_api.post(f'/{self.client_id}/schedules/delete',
                                      json={'type': 'weekly'},
                                      headers={"Authorization": f"Bearer {self.mdr_api.auth.uis_token.value}"})
         assert response.status_code == HTTPStatus.OK, \
             f"Schedule has not been deleted. SC: {response.status_code}. Msg: {response.text}"
+        self._update_cached(lambda schedules: [schedule for schedule in schedules if schedule['type'] != 'weekly'])
         return response.json()
 
-    def create(self, body):
+    def create(self, body, force_refresh: bool = False):
+        """
+        Create schedule, nothing is sent if the cached list already has the same schedule
+        param: force_refresh: drop cached list and send the request anyway
+        :return: the schedule: body with fields of schedules/create response, or the same schedule from the list
+        """
+        if force_refresh:
+            self.force_refresh()
+        else:
+            for schedule in self.get():
+                if all(schedule.get(field) == value for field, value in body.items()):
+                    return dict(schedule)
+
         # uis_token is a Secret
         response = self.mdr_api.post(f'/{self.client_id}/schedules/create',
                                      json=body,
-                                     headers={"Authorization": f"Bearer {self.mdr_api.auth.uis_token.value}"})
+                                     headers={"Authorization": f"Bearer {self.mdr_api.auth.uis_token.value}"},
+                                     idempotent=False)
 
         assert response.status_code == HTTPStatus.OK, \
             f"Schedule has not been created. SC: {response.status_code}. Msg: {response.text}"
 
-        return response.json()
+        created = response.json()
+        schedule = {**body, **created} if isinstance(created, dict) else dict(body)
+        self._update_cached(lambda schedules: [item for item in schedules if item.get('type') != body.get('type')]
+                            + [schedule])
+        return dict(schedule)
 
-    def get(self):
+    def _get(self):
         # uis_token is a Secret
         response = self.mdr_api.post(f'/{self.client_id}/schedules/list',
                                      json={},
@@ -42,3 +87,11 @@ class Schedules:
             f"Schedule list has not been received. SC: {response.status_code}. Msg: {response.text}"
 
         return response.json()
+
+    def get(self, force_refresh: bool = False):
+        """
+        Cached schedule list, see state_ttl. Do not modify returned list
+        """
+        if force_refresh:
+            self.force_refresh()
+        return self._state.get_or_load(self.client_id, self._get)
@@ -0,0 +1,90 @@
+import fcntl
+import json
+import logging
+import os
+from contextlib import contextmanager
+from typing import List, Optional
+
+from at_utils.secrets import Secret
+
+logger = logging.getLogger()
+
+
+class SessionCache:
+    """
+    Opt-in file cache of robot sessions shared by pytest-xdist workers and CI jobs of one host.
+    Key is (client_id, tenants, role), value is refresh token and session id.
+    The file is readable by its owner only, access is serialized with flock:
+        with cache.locked():
+            entry = cache.get(key)
+            ...
+            cache.put(key, refresh_token, session_id)
+    """
+    ENV = 'MDR_SESSION_CACHE'
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.lock_path = f'{self.path}.lock'
+
+    @classmethod
+    def from_env(cls) -> Optional["SessionCache"]:
+        """
+        Cache is enabled by MDR_SESSION_CACHE=<path>
+        """
+        path = os.environ.get(cls.ENV)
+        return cls(path) if path else None
+
+    @staticmethod
+    def key(client_id: str, tenants: List[dict], role: str) -> str:
+        tenant_ids = sorted(tenant["tenant_id"] for tenant in tenants or [])
+        return json.dumps([client_id, tenant_ids, role])
+
+    @contextmanager
+    def locked(self):
+        """
+        Exclusive lock between processes, it is not reentrant
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield self
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logger.warning(f'Session cache {self.path} is corrupted and will be rewritten')
+            return {}
+
+    def _write(self, data: dict) -> None:
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        :return: {"refresh_token": Secret, "session_id": str} or None
+        """
+        entry = self._read().get(key)
+        if not entry:
+            return None
+        return {"refresh_token": Secret(entry["refresh_token"]), "session_id": entry["session_id"]}
+
+    def put(self, key: str, refresh_token: str, session_id: str) -> None:
+        data = self._read()
+        data[key] = {"refresh_token": refresh_token, "session_id": session_id}
+        self._write(data)
+
+    def remove(self, key: str) -> None:
+        data = self._read()
+        if data.pop(key, None) is not None:
+            self._write(data)
@@ -0,0 +1,151 @@
+import logging
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Hashable, List, Tuple
+
+logger = logging.getLogger()
+
+
+class SessionPool:
+    """
+    Live MDR sessions kept open at the same time, one per (client_id, tenants, role).
+    A session is opened by opener on the first use and reused until it is evicted, discarded or the pool is closed.
+    The least recently used session which is not leased is closed when the pool is full
+    """
+
+    def __init__(self, opener: Callable[[Tuple], Any], closer: Callable[[Any], None], max_sessions: int = 8):
+        """
+        param: opener: logs in and returns session of the key
+        param: closer: deletes session returned by opener
+        param: max_sessions: max number of live sessions
+        """
+        self.opener = opener
+        self.closer = closer
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.RLock()
+        self._open_locks = {}
+        # id of session -> number of lease() scopes using it
+        self._leases = Counter()
+        # sessions removed from the pool while in use, closed by the last release
+        self._retired = {}
+
+    @staticmethod
+    def key(client_id: str, tenants: List[dict], role: str) -> Tuple:
+        return client_id, tuple(sorted(tenant["tenant_id"] for tenant in tenants or [])), role
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Session of the key, several threads asking for a new key wait for one login.
+        The session can be evicted by the next get of another key, use lease() to keep it while it is used
+        """
+        return self._get(key, lease=False)
+
+    @contextmanager
+    def lease(self, key: Hashable):
+        """
+        Session of the key which is not closed until the scope exits:
+            with pool.lease(key) as session:
+                ...
+        Sessions in use are not evicted, discarded one is closed by the last scope using it
+        """
+        session = self._get(key, lease=True)
+        try:
+            yield session
+        finally:
+            self._release(session)
+
+    def _get(self, key: Hashable, lease: bool) -> Any:
+        with self._lock:
+            if key in self._sessions:
+                self._sessions.move_to_end(key)
+                return self._leased(self._sessions[key], lease)
+            open_lock = self._open_locks.setdefault(key, threading.Lock())
+
+        with open_lock:
+            with self._lock:
+                if key in self._sessions:
+                    return self._leased(self._sessions[key], lease)
+
+            session = self.opener(key)
+            with self._lock:
+                self._sessions[key] = session
+                self._leased(session, lease)
+                evicted = self._evict()
+
+        self._close_evicted(evicted)
+        return session
+
+    def _leased(self, session: Any, lease: bool) -> Any:
+        if lease:
+            self._leases[id(session)] += 1
+        return session
+
+    def _release(self, session: Any) -> None:
+        with self._lock:
+            if not self._leases[id(session)]:
+                # pool was closed while the session was used
+                return
+            self._leases[id(session)] -= 1
+            if self._leases[id(session)]:
+                return
+            del self._leases[id(session)]
+            retired = self._retired.pop(id(session), None)
+            evicted = self._evict()
+
+        if retired is not None:
+            self._close(retired)
+        self._close_evicted(evicted)
+
+    def _evict(self) -> List[Tuple]:
+        """
+        Remove least recently used sessions over max_sessions, sessions in use are kept
+        """
+        evicted = []
+        for key in list(self._sessions):
+            if len(self._sessions) <= self.max_sessions:
+                break
+            if not self._leases[id(self._sessions[key])]:
+                evicted.append((key, self._sessions.pop(key)))
+        return evicted
+
+    def _close_evicted(self, evicted: List[Tuple]) -> None:
+        for evicted_key, evicted_session in evicted:
+            logger.info(f'Session {evicted_key} was evicted from session pool')
+            self._close(evicted_session)
+
+    def _close(self, session: Any) -> None:
+        try:
+            self.closer(session)
+        except (AssertionError, OSError) as e:
+            logger.warning(f'Session was not closed. {e}')
+
+    def discard(self, key: Hashable) -> None:
+        """
+        Remove session of the key, the next get opens a new one. Session in use is closed when it is released
+        """
+        with self._lock:
+            session = self._sessions.pop(key, None)
+            if session is not None and self._leases[id(session)]:
+                self._retired[id(session)] = session
+                return
+        if session is not None:
+            self._close(session)
+
+    def close(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values()) + list(self._retired.values())
+            self._sessions.clear()
+            self._retired.clear()
+            self._leases.clear()
+        for session in sessions:
+            self._close(session)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._sessions
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
@@ -1,26 +1,44 @@
 from http import HTTPStatus
 
 from ..decorators import for_all_methods, token_update
+from .cache import TTLCache
 
 
 @for_all_methods(token_update)
 class Settings:
+    # seconds the settings read from the portal are reused, None - until force_refresh()
+    state_ttl = 60
+
     def __init__(self, mdr_api):
         self.mdr_api = mdr_api
+        self._state = TTLCache(self.state_ttl)
 
     @property
     def client_id(self):
         return self.mdr_api.auth.client_id
 
-    @property
-    def auto_accept(self):
+    def force_refresh(self):
+        """
+        Drop cached settings, the next read goes to the portal
+        """
+        self._state.invalidate()
+
+    def _get_auto_accept(self):
         response = self.mdr_api.post(f'/{self.client_id}/settings/auto_response/get', json={})
         assert response.status_code == HTTPStatus.OK, f"Auto accepting response has not been set. " \
                                                       f"Status code {response.status_code}"
         return response.json()['auto_response']
 
+    @property
+    def auto_accept(self):
+        return self._state.get_or_load((self.client_id, 'auto_response'), self._get_auto_accept)
+
     @auto_accept.setter
     def auto_accept(self, state: bool):
+        key = (self.client_id, 'auto_response')
+        if key in self._state and self._state.get(key) == state:
+            return
+
         body = {
             'auto_response': state
         }
@@ -28,3 +46,4 @@ class Settings:
         response = self.mdr_api.post(f'/{self.client_id}/settings/auto_response/set', json=body)
         assert response.status_code == HTTPStatus.OK, f"Auto accepting response status has not been received. " \
                                                       f"Status code {response.status_code}"
+        self._state.set(key, state)
@@ -1,21 +1,41 @@
 from http import HTTPStatus
+from typing import Dict, List, Optional
+
 from ..decorators import for_all_methods, token_update
+from .cache import TTLCache
+from .models import Tenant
+
+
+class TenantDirectory:
+    """
+    Snapshot of /tenants/list with indexes by name and id
+    """
+
+    def __init__(self, tenants: List[dict]):
+        self.tenants = tenants
+        self.by_name: Dict[str, dict] = {tenant['tenant_name']: tenant for tenant in tenants}
+        self.by_id: Dict[str, dict] = {tenant['tenant_id']: tenant for tenant in tenants}
 
 
 @for_all_methods(token_update)
 class Tenants:
+    # seconds the tenant directory is reused, None - until invalidate_directory()
+    directory_ttl = 300
+
     def __init__(self, mdr_api):
         self.mdr_api = mdr_api
+        self._directory = TTLCache(self.directory_ttl)
 
     @property
     def client_id(self):
         return self.mdr_api.auth.client_id
 
     def create(self, body: dict):
-        response = self.mdr_api.post(f'/{self.client_id}/tenants/create', json=body)
+        response = self.mdr_api.post(f'/{self.client_id}/tenants/create', json=body, idempotent=False)
         assert response.status_code == HTTPStatus.OK, \
             f"Tenant {body} has not created. SC: {response.status_code}. Msg: {response.text}"
-        return response.json()
+        self.invalidate_directory()
+        return self.mdr_api.decode(response, Tenant)
 
     def delete(self, body: dict):
         """
@@ -24,20 +44,51 @@ class Tenants:
         response = self.mdr_api.post(f'/{self.client_id}/tenants/delete', json=body)
         assert response.status_code == HTTPStatus.OK, \
             f"Tenant {body} has not deleted. SC: {response.status_code}. Msg: {response.text}"
+        self.invalidate_directory()
         return response.json()
 
-    @property
-    def tenants(self):
+    def _list(self) -> List[dict]:
         headers = {"Authorization": f"Bearer {self.mdr_api.auth.uis_token.value}"}
         response = self.mdr_api.post(f'/{self.client_id}/tenants/list', json={}, headers=headers)
 
         assert response.status_code == HTTPStatus.OK, \
             f"Tenant list has not been received. SC: {response.status_code}. Msg: {response.text}"
-        return response.json()
+        return self.mdr_api.decode(response, Tenant)
+
+    @property
+    def directory(self) -> TenantDirectory:
+        """
+        Cached tenant list of the client, see directory_ttl
+        """
+        return self._directory.get_or_load(self.client_id, lambda: TenantDirectory(self._list()))
+
+    def invalidate_directory(self) -> None:
+        self._directory.invalidate()
+
+    def share_directory(self, tenants: "Tenants") -> None:
+        """
+        Use tenant directory of another session of the same client,
+        create/delete through any of the sessions invalidates it for all of them
+        """
+        self._directory = tenants._directory
+
+    @property
+    def tenants(self):
+        return self.directory.tenants
 
     def tenant_info(self, tenant_name: str):
-        for tenant in self.tenants:
-            if tenant_name == tenant['tenant_name']:
-                return tenant
+        tenant = self.directory.by_name.get(tenant_name)
+        if tenant is None:
+            # tenant could be created by another client after the directory was loaded
+            self.invalidate_directory()
+            tenant = self.directory.by_name.get(tenant_name)
+        if tenant is None:
+            raise AssertionError(f'Tenant with name {tenant_name} has not been found in {self.directory.tenants}')
+        return tenant
 
-        raise AssertionError(f'Tenant with name {tenant_name} has not been found in {self.tenants}')
+    def tenant_by_id(self, tenant_id: str) -> Optional[dict]:
+        tenant = self.directory.by_id.get(tenant_id)
+        if tenant is None:
+            self.invalidate_directory()
+            tenant = self.directory.by_id.get(tenant_id)
+        return tenant
@@ -0,0 +1,101 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import jwt
+
+logger = logging.getLogger()
+
+
+def token_expiration(access_token: str) -> Optional[float]:
+    """
+    exp claim of JWT access token in epoch seconds
+    """
+    parsed_token = jwt.decode(access_token, options={"verify_signature": False}, algorithms=["RS256"])
+    return parsed_token.get('exp')
+
+
+class TokenManager:
+    """
+    Keeps MDR access token of Auth alive: refresh is scheduled leeway seconds before exp claim
+    and is also done synchronously before a request if the background refresh did not happen in time
+    """
+
+    def __init__(self, auth, leeway: float = 60, background: bool = True):
+        """
+        param: leeway: seconds before expiration when token is refreshed
+        param: background: refresh token in a timer thread
+        """
+        self.auth = auth
+        self.leeway = leeway
+        self.background = background
+        self.expires_at = None
+        self.access_token = None
+        self._timer = None
+        self._local = threading.local()
+
+    def track(self, access_token: str) -> None:
+        """
+        Remember expiration of the new access token and schedule its refresh
+        """
+        self.access_token = access_token
+        try:
+            self.expires_at = token_expiration(access_token)
+        except jwt.PyJWTError as e:
+            logger.warning(f'Expiration of access token is unknown, proactive refresh is disabled: {e}')
+            self.expires_at = None
+        self._schedule()
+
+    def _schedule(self) -> None:
+        self.cancel()
+        if not self.background or self.expires_at is None:
+            return
+
+        delay = max(self.expires_at - self.leeway - time.time(), 0)
+        self._timer = threading.Timer(delay, self._refresh_in_background, args=(self.access_token,))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _refresh_in_background(self, access_token: str) -> None:
+        # full login is left to ensure_fresh() of the next request
+        try:
+            self.auth.refresh(token=access_token, relogin=False)
+        except Exception as e:
+            logger.warning(f'Background refresh of access token has failed: {e}')
+
+    def cancel(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    @property
+    def expires_soon(self) -> bool:
+        return self.expires_at is not None and time.time() >= self.expires_at - self.leeway
+
+    @property
+    def is_refreshing(self) -> bool:
+        return getattr(self._local, 'refreshing', False)
+
+    @contextmanager
+    def refreshing(self):
+        """
+        Requests sent inside login or refresh must not trigger one more refresh
+        """
+        previous = self.is_refreshing
+        self._local.refreshing = True
+        try:
+            yield
+        finally:
+            self._local.refreshing = previous
+
+    def ensure_fresh(self) -> None:
+        """
+        Called before every request: waits for the refresh in flight and refreshes expiring token
+        """
+        if self.is_refreshing:
+            return
+        self.auth.wait_for_refresh()
+        if self.expires_soon:
+            self.auth.refresh(force=False)
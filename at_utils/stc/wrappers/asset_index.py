@@ -0,0 +1,145 @@
+import bisect
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+
+class AssetIndex:
+    """
+    Lookup tables built once over an asset inventory.
+    Host name part search keeps the semantics of the original lookup: the upper-cased part is searched
+    in host names as they are, so "ws" finds "WS-01" but not "ws-01". Trigrams of upper-cased host names
+    only narrow the candidates. All results keep the inventory order unless they are explicitly ordered by last_seen
+    """
+    NGRAM = 3
+
+    def __init__(self, assets: List[dict]):
+        self.assets = assets
+        self._by_id: Dict[str, int] = {}
+        self._by_host_name: Dict[str, List[int]] = defaultdict(list)
+        self._by_status: Dict[str, set] = defaultdict(set)
+        self._by_os_version: Dict[str, set] = defaultdict(set)
+        self._by_product: Dict[str, set] = defaultdict(set)
+        self._host_names: List[str] = []
+        self._upper_host_names: List[str] = []
+        self._ngrams: Optional[Dict[str, List[int]]] = None
+
+        for position, asset in enumerate(assets):
+            host_name = asset.get("host_name") or ""
+            self._by_id[asset.get("asset_id")] = position
+            self._by_host_name[host_name].append(position)
+            self._host_names.append(host_name)
+            self._upper_host_names.append(host_name.upper())
+
+            status = asset.get("status")
+            for value in (status if isinstance(status, (list, tuple, set)) else [status]):
+                self._by_status[value].add(position)
+            self._by_os_version[asset.get("os_version") or ""].add(position)
+            for product in asset.get("product_map") or ():
+                self._by_product[product].add(position)
+
+        self._sorted_host_names = sorted((name, position) for position, name in enumerate(self._upper_host_names))
+        self._by_last_seen = sorted(range(len(assets)), key=lambda position: assets[position].get("last_seen") or 0)
+        self._last_seen_rank = [0] * len(assets)
+        for rank, position in enumerate(self._by_last_seen):
+            self._last_seen_rank[position] = rank
+
+    def __len__(self):
+        return len(self.assets)
+
+    def _select(self, positions: Iterable[int]) -> List[dict]:
+        return [self.assets[position] for position in sorted(positions)]
+
+    def _build_ngrams(self) -> Dict[str, List[int]]:
+        ngrams = defaultdict(list)
+        for position, name in enumerate(self._upper_host_names):
+            for gram in {name[i:i + self.NGRAM] for i in range(len(name) - self.NGRAM + 1)}:
+                ngrams[gram].append(position)
+        return ngrams
+
+    def _containing(self, part: str) -> set:
+        """
+        Positions of host names containing part.upper()
+        """
+        substring = part.upper()
+        if len(substring) < self.NGRAM:
+            return {position for position, name in enumerate(self._host_names) if substring in name}
+
+        if self._ngrams is None:
+            self._ngrams = self._build_ngrams()
+
+        grams = {substring[i:i + self.NGRAM] for i in range(len(substring) - self.NGRAM + 1)}
+        postings = sorted((self._ngrams.get(gram, []) for gram in grams), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(posting)
+
+        return {position for position in candidates if substring in self._host_names[position]}
+
+    def asset(self, asset_id: str) -> Optional[dict]:
+        position = self._by_id.get(asset_id)
+        return None if position is None else self.assets[position]
+
+    def by_host_name(self, host_name: str) -> List[dict]:
+        """
+        Exact and case sensitive host name match
+        """
+        return self._select(self._by_host_name.get(host_name, []))
+
+    def with_host_name_prefix(self, prefix: str) -> List[dict]:
+        """
+        Case insensitive prefix match
+        """
+        prefix = prefix.upper()
+        start = bisect.bisect_left(self._sorted_host_names, (prefix, -1))
+        positions = []
+        for name, position in self._sorted_host_names[start:]:
+            if not name.startswith(prefix):
+                break
+            positions.append(position)
+        return self._select(positions)
+
+    def with_host_name_part(self, part: str) -> List[dict]:
+        return self._select(self._containing(part))
+
+    def with_status(self, status: str) -> List[dict]:
+        return self._select(self._status_positions(status))
+
+    def _status_positions(self, status: str) -> set:
+        positions = set()
+        for value, value_positions in self._by_status.items():
+            if status == value or (isinstance(value, str) and status in value):
+                positions |= value_positions
+        return positions
+
+    def _os_positions(self, platform: str) -> set:
+        positions = set()
+        for os_version, os_positions in self._by_os_version.items():
+            if platform in os_version:
+                positions |= os_positions
+        return positions
+
+    def by_last_seen(self, assets: Iterable[dict] = None) -> List[dict]:
+        """
+        Assets ordered by last_seen ascending, the whole inventory if assets are not passed
+        """
+        if assets is None:
+            return [self.assets[position] for position in self._by_last_seen]
+        return sorted(assets, key=lambda asset: self._last_seen_rank[self._by_id[asset.get("asset_id")]])
+
+    def last_seen(self, host_name_part: str) -> Optional[dict]:
+        """
+        The most recently seen asset which host name contains host_name_part
+        """
+        positions = self._containing(host_name_part)
+        if not positions:
+            return None
+        return self.assets[max(positions, key=self._last_seen_rank.__getitem__)]
+
+    def with_platform_and_product(self, platform: str, product: str) -> List[dict]:
+        """
+        Assets with os_version containing platform and product in product_map ordered by last_seen
+        """
+        positions = self._os_positions(platform) & self._by_product.get(product, set())
+        return [self.assets[position] for position in sorted(positions, key=self._last_seen_rank.__getitem__)]
@@ -0,0 +1,129 @@
+import logging
+import threading
+from typing import Callable, Hashable, Iterable, List, Optional, Tuple
+
+from ..api.cache import TTLCache
+from .asset_index import AssetIndex
+
+logger = logging.getLogger()
+
+Projection = Optional[Tuple[str, ...]]
+
+
+def projection(fields: Optional[Iterable[str]]) -> Projection:
+    """
+    Cache key of requested fields, None - full records
+    """
+    return tuple(sorted(set(fields))) if fields else None
+
+
+class AssetInventory:
+    """
+    Cached copy of /assets/list shared by all asset helpers of MDRManager.
+    Entries are stored per key (client_id and tenants of the current session) and projection (fields),
+    they live ttl seconds. A projection is served by any cached inventory having all its fields
+    """
+
+    def __init__(self, loader: Callable[[Projection], List[dict]], key: Callable[[], Hashable],
+                 ttl: Optional[float] = 300, shared_fields: Optional[Iterable[str]] = None):
+        """
+        param: loader: downloads the whole inventory with the fields, all fields for None
+        param: key: returns cache key of the current session
+        param: ttl: seconds before inventory is downloaded again, None - until invalidate()
+        param: shared_fields: narrower projections are downloaded with these fields,
+            so lookups needing different subsets of them share one download
+        """
+        self._loader = loader
+        self._key = key
+        self._shared = projection(shared_fields)
+        self._cache = TTLCache(ttl)
+        self._indexes = {}
+        self._projections = set()
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return self._cache.ttl
+
+    @ttl.setter
+    def ttl(self, value: Optional[float]):
+        self._cache.ttl = value
+
+    @property
+    def key(self) -> Hashable:
+        return self._key()
+
+    def _covering_key(self, fields: Projection) -> Optional[Tuple]:
+        """
+        Cache key of the inventory which has all fields: the same projection, a wider one or full records
+        """
+        key = self.key
+        with self._lock:
+            projections = list(self._projections)
+        candidates = [fields] + [cached for cached in projections
+                                 if cached is not None and fields is not None and set(fields) <= set(cached)]
+        candidates.append(None)
+        for candidate in candidates:
+            if (key, candidate) in self._cache:
+                return key, candidate
+        return None
+
+    def _projection_to_load(self, fields: Projection) -> Projection:
+        if fields is not None and self._shared is not None and set(fields) <= set(self._shared):
+            return self._shared
+        return fields
+
+    def _get(self, fields: Projection) -> Tuple[Tuple, List[dict]]:
+        cache_key = self._covering_key(fields) or (self.key, self._projection_to_load(fields))
+        # covering inventory may expire meanwhile, it is reloaded with its own fields
+        return cache_key, self._cache.get_or_load(cache_key, lambda: self._load(cache_key[1]))
+
+    def get(self, fields: Optional[Iterable[str]] = None) -> List[dict]:
+        """
+        Inventory with at least the fields, returned list is shared between callers, copy it before modification
+        """
+        return self._get(projection(fields))[1]
+
+    @property
+    def assets(self) -> List[dict]:
+        return self.get()
+
+    def index_for(self, fields: Optional[Iterable[str]] = None) -> AssetIndex:
+        """
+        Index over the cached inventory, rebuilt only when the inventory itself is reloaded
+        """
+        cache_key, assets = self._get(projection(fields))
+        index = self._indexes.get(cache_key)
+        if index is None or index.assets is not assets:
+            index = self._indexes[cache_key] = AssetIndex(assets)
+        return index
+
+    @property
+    def index(self) -> AssetIndex:
+        return self.index_for()
+
+    def is_cached(self, fields: Optional[Iterable[str]] = None) -> bool:
+        return self._covering_key(projection(fields)) is not None
+
+    def _load(self, fields: Projection) -> List[dict]:
+        with self._lock:
+            self._projections.add(fields)
+        assets = self._loader(fields)
+        logger.info(f'Asset inventory {self.key} was loaded: {len(assets)} assets, fields {fields or "all"}')
+        return assets
+
+    def invalidate(self, all_keys: bool = False) -> None:
+        """
+        Drop inventory of the current session or of all sessions
+        """
+        if all_keys:
+            self._cache.invalidate()
+            self._indexes.clear()
+            return
+
+        key = self.key
+        with self._lock:
+            projections = list(self._projections)
+        for fields in projections:
+            self._cache.invalidate((key, fields))
+            self._indexes.pop((key, fields), None)
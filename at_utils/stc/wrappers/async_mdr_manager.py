@@ -0,0 +1,59 @@
+from typing import List
+
+from ..api.async_api import AsyncMDRRestAPi, AsyncRunner, AsyncWrapper
+from .mdr_manager import MDRManager
+
+
+class AsyncMDRManager(AsyncWrapper):
+    """
+    Asyncio counterpart of MDRManager, every manager method is awaitable:
+        manager = await AsyncMDRManager.create()
+        incidents = await manager.get_list_incidents(max_page=1)
+    Wrappers are available as in MDRManager: await manager.incidents.details(body)
+    """
+
+    def __init__(self, manager: MDRManager, concurrency: int = 32):
+        self.manager = manager
+        self.api = AsyncMDRRestAPi(api=manager.api, concurrency=concurrency)
+        super(AsyncMDRManager, self).__init__(manager, self.api)
+
+    @classmethod
+    async def create(cls, concurrency: int = 32, **kwargs) -> "AsyncMDRManager":
+        """
+        Login in the executor, kwargs are MDRManager arguments
+        """
+        runner = AsyncRunner(concurrency=1)
+        try:
+            manager = await runner.run(MDRManager, **kwargs)
+        finally:
+            await runner.aclose()
+        return cls(manager, concurrency)
+
+    def __getattr__(self, name: str):
+        if name in ('api', 'manager'):
+            raise AttributeError(name)
+        api_wrapper = getattr(self.api, name, None)
+        if isinstance(api_wrapper, AsyncWrapper):
+            return api_wrapper
+        return super(AsyncMDRManager, self).__getattr__(name)
+
+    async def create_incidents(self, specs: List[dict]) -> List[dict]:
+        """
+        Create incidents concurrently, specs are create_incident arguments
+        """
+        return await self.api.gather(self.create_incident(**spec) for spec in specs)
+
+    async def delete_sessions_by_id(self, session_ids: List[str]) -> List[dict]:
+        return await self.api.gather(self.auth.delete(session_id) for session_id in session_ids)
+
+    def close(self) -> None:
+        self.api.close()
+
+    async def aclose(self) -> None:
+        await self.api.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
@@ -0,0 +1,89 @@
+import heapq
+import itertools
+from collections import defaultdict, deque
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .history_sync import entity_type, record_key
+
+
+def record_time(record: dict) -> int:
+    return record.get("record_time") or 0
+
+
+class _IndexStream:
+    """
+    Read position in one entity index of history
+    """
+
+    def __init__(self, kind: str, records: List[dict], min_record_time: Optional[int], page_size: int):
+        self.kind = kind
+        self.buffer = deque(records)
+        self.exhausted = len(records) < page_size
+        self.min_record_time = min_record_time
+        self.page = 1
+        self.last_time = None
+        self.boundary_keys = set()
+
+    def pop(self) -> dict:
+        record = self.buffer.popleft()
+        if record_time(record) != self.last_time:
+            self.last_time = record_time(record)
+            self.boundary_keys = set()
+        self.boundary_keys.add(record_key(record))
+        return record
+
+
+class HistoryCursor:
+    """
+    Globally ordered iterator over incidents history.
+    Server paginates every entity index separately (entity_type_page_size), so the cursor keeps a read
+    position per index: the next page of an index is requested from the record_time of its last yielded
+    record, and indexes are k-way merged by record_time. At most page_size records per index are in memory
+    """
+
+    def __init__(self, history: Callable[..., List[dict]], page_size: int = 100,
+                 min_record_time: Optional[int] = None, **filters):
+        """
+        param: history: MDRManager.get_incidents_history compatible callable
+        param: filters: other get_incidents_history filters: incident_id, max_record_time, ignore_self
+        """
+        self.history = history
+        self.page_size = page_size
+        self.min_record_time = min_record_time
+        self.filters = filters
+
+    def _fetch(self, min_record_time: Optional[int], page: int) -> Dict[str, List[dict]]:
+        records = self.history(min_record_time=min_record_time, page=page, page_size=self.page_size, **self.filters)
+        by_type = defaultdict(list)
+        for record in records:
+            by_type[entity_type(record)].append(record)
+        return by_type
+
+    def _refill(self, stream: _IndexStream) -> None:
+        while not stream.buffer and not stream.exhausted:
+            if stream.min_record_time == stream.last_time:
+                # a whole page had the same record_time, step to the next page of this time
+                stream.page += 1
+            else:
+                stream.min_record_time = stream.last_time
+                stream.page = 1
+
+            records = self._fetch(stream.min_record_time, stream.page).get(stream.kind, [])
+            stream.exhausted = len(records) < self.page_size
+            stream.buffer.extend(record for record in records if record_key(record) not in stream.boundary_keys)
+
+    def __iter__(self) -> Iterator[dict]:
+        order = itertools.count()
+        streams = {kind: _IndexStream(kind, records, self.min_record_time, self.page_size)
+                   for kind, records in self._fetch(self.min_record_time, 1).items()}
+        heap = [(record_time(stream.buffer[0]), next(order), kind) for kind, stream in streams.items() if stream.buffer]
+        heapq.heapify(heap)
+
+        while heap:
+            _, _, kind = heapq.heappop(heap)
+            stream = streams[kind]
+            yield stream.pop()
+
+            self._refill(stream)
+            if stream.buffer:
+                heapq.heappush(heap, (record_time(stream.buffer[0]), next(order), kind))
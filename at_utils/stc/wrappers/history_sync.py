@@ -0,0 +1,101 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import List, Tuple
+
+logger = logging.getLogger()
+
+
+def entity_type(record: dict) -> str:
+    """
+    History record keeps its entity under a single key: incident_details, incident_comment, ...
+    """
+    return next(iter(record["entity"]))
+
+
+def record_key(record: dict) -> Tuple:
+    """
+    Entity id and operation identify a record, record_time separates several updates of one entity
+    """
+    kind = entity_type(record)
+    entity = record["entity"][kind]
+    entity_id = entity.get("comment_id") or entity.get("incident_id")
+    return kind, entity_id, record["operation"], record.get("record_time")
+
+
+class IncidentHistorySync:
+    """
+    Incremental local copy of incidents history.
+    Records and the last seen record_time (watermark) are stored in a JSON file per client and tenants,
+    every sync requests only records with record_time >= watermark
+    """
+    ENV = 'MDR_HISTORY_STORE'
+
+    def __init__(self, manager, store_dir: str = None, page_size: int = 10000):
+        """
+        param: store_dir: directory of history files, MDR_HISTORY_STORE or system temp directory by default
+        param: page_size: records per entity index in one history request
+        """
+        self.manager = manager
+        self.store_dir = store_dir or os.environ.get(self.ENV) or os.path.join(tempfile.gettempdir(), 'mdr_history')
+        self.page_size = page_size
+
+    @property
+    def path(self) -> str:
+        client_id, tenants = self.manager._session_key()
+        tenants_hash = hashlib.sha1(json.dumps(tenants).encode()).hexdigest()[:12]
+        return os.path.join(self.store_dir, f'{client_id}_{tenants_hash}.json')
+
+    def load(self) -> dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"watermark": None, "records": []}
+
+    def _save(self, state: dict) -> None:
+        os.makedirs(self.store_dir, exist_ok=True)
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            # records are dicts or Mapping models
+            json.dump(state, f, default=dict)
+        os.replace(tmp_path, self.path)
+
+    @property
+    def history(self) -> List[dict]:
+        """
+        Merged history ordered by record_time
+        """
+        return self.load()["records"]
+
+    def reset(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def sync(self, min_record_time: int = None) -> List[dict]:
+        """
+        Fetch records newer than the stored watermark and merge them into the local copy
+        param: min_record_time: start of history for the first sync, whole history by default
+        :return: new records
+        """
+        state = self.load()
+        known = {record_key(record) for record in state["records"]}
+        since = state["watermark"] if state["watermark"] is not None else min_record_time
+
+        added = []
+        for record in self.manager.iter_incidents_history(min_record_time=since, page_size=self.page_size):
+            key = record_key(record)
+            if key not in known:
+                known.add(key)
+                added.append(record)
+
+        if added:
+            state["records"].extend(added)
+            state["records"].sort(key=lambda record: record.get("record_time") or 0)
+            state["watermark"] = state["records"][-1].get("record_time")
+            self._save(state)
+
+        logger.info(f'Incidents history sync: {len(added)} new records, {len(state["records"])} in total')
+        return added
@@ -1,28 +1,74 @@
+import copy
 import logging
+import math
 import random
-from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from typing import Callable, List, Optional, Tuple
 
 import TEST_ENV_E2E
 import MDRRestAPi
 
+from ..api.http_pool import ConnectionPool
+from ..api.pagination import fetch_all, iter_pages
+from ..api.rate_limit import RateLimiter
+from ..api.session_cache import SessionCache
+from ..api.session_pool import SessionPool
+from .asset_inventory import AssetInventory
+from .history_cursor import HistoryCursor
+from .history_sync import IncidentHistorySync
+from .polling import wait_until
+
 logger = logging.getLogger()
 
+# fields enough to pick an asset by host name
+ASSET_MIN_FIELDS = ["asset_id", "host_name"]
+# fields used by AssetIndex lookups, narrower projections are downloaded with them to share one walk
+ASSET_INDEX_FIELDS = ["asset_id", "host_name", "status", "os_version", "product_map", "last_seen"]
+
 
 class MDRManager:
     """
     This class wrapper for work with MDRRestApi
     """
 
-    def __init__(self, url: str = None, client_id: str = None):
+    def __init__(self, url: str = None, client_id: str = None, assets_ttl: Optional[float] = 300,
+                 concurrency: int = 8, pool: ConnectionPool = None, session_cache: str = None,
+                 history_store: str = None, rate_limiter: RateLimiter = None, uis_url: str = None,
+                 max_sessions: int = 8, models: bool = False):
         """
         param: client_id: userDescriptionEx
+        param: assets_ttl: seconds the downloaded asset inventory is reused, None - until invalidate_assets()
+        param: concurrency: max number of pages fetched in parallel
+        param: pool: HTTP connection pool, process wide pool is used by default
+        param: session_cache: path of session cache file shared between processes, MDR_SESSION_CACHE by default
+        param: history_store: directory of incremental incidents history, MDR_HISTORY_STORE by default
+        param: rate_limiter: client side rate and in-flight limits per endpoint
+        param: uis_url: UIS address, TEST_ENV_E2E.uis_url by default
+        param: max_sessions: max number of tenant sessions kept alive by as_tenant
+        param: models: assets, incidents, comments, history, tenants and sessions are returned as slot based records
         """
         self.url = url or TEST_ENV_E2E.mdr_url
         self.client_id = client_id or TEST_ENV_E2E.mdr_client_id
-        self.api = MDRRestAPi(address=self.url, prefix="api/v1")
+        self.concurrency = concurrency
+        self.api = MDRRestAPi(address=self.url, prefix="api/v1", pool=pool, rate_limiter=rate_limiter, models=models)
+        self.api.auth.uis_url = uis_url
+        if session_cache:
+            self.api.auth.session_cache = SessionCache(session_cache)
+        self.asset_inventory = AssetInventory(loader=self._download_assets,
+                                              key=self._session_key,
+                                              ttl=assets_ttl,
+                                              shared_fields=ASSET_INDEX_FIELDS)
+        self.history_sync = IncidentHistorySync(self, store_dir=history_store)
+        self.session_pool = SessionPool(opener=self._open_session, closer=self._close_session,
+                                        max_sessions=max_sessions)
         self.login(client_id=self.client_id)
 
     def __getattr__(self, attr):
+        if attr == 'api':
+            # not initialized yet, e.g. while copying
+            raise AttributeError(attr)
         return getattr(self.api, attr)
 
     """
@@ -35,86 +81,180 @@ class MDRManager:
         self.client_id = kwargs.get("client_id") or self.client_id
         kwargs["client_id"] = self.client_id
 
-        if self.auth.session_id and delete_session:
+        if self.auth.session_id and delete_session and not self.auth.session_shared:
             self.auth.delete_session(self.auth.session_id)
 
         self.auth.to_login(**kwargs)
 
+    def _session_key(self):
+        """
+        Key of data visible to the current session: client and tenants of the access token
+        """
+        tenants = self.auth.tenants or []
+        return self.client_id, tuple(sorted(tenant["tenant_id"] for tenant in tenants))
+
+    def _scoped(self, api: MDRRestAPi) -> "MDRManager":
+        """
+        Manager sharing settings and pools with this one, but working through another session
+        """
+        scoped = copy.copy(self)
+        scoped.api = api
+        scoped.asset_inventory = AssetInventory(loader=scoped._download_assets,
+                                                key=scoped._session_key,
+                                                ttl=self.asset_inventory.ttl,
+                                                shared_fields=ASSET_INDEX_FIELDS)
+        scoped.history_sync = IncidentHistorySync(scoped, store_dir=self.history_sync.store_dir,
+                                                  page_size=self.history_sync.page_size)
+        return scoped
+
+    def _open_session(self, key) -> "MDRManager":
+        client_id, tenant_ids, role = key
+        api = MDRRestAPi(address=self.url, prefix="api/v1", pool=self.api.pool, retry_policy=self.api.retry_policy,
+                         rate_limiter=self.api.rate_limiter, metrics=self.api.metrics, models=self.api.models)
+        api.auth.uis_url = self.auth.uis_url
+        api.auth.session_cache = self.auth.session_cache
+        api.tenants.share_directory(self.api.tenants)
+        api.auth.to_login(login=self.auth.login, password=self.auth.password.value, client_id=client_id,
+                          tenants=[{"tenant_id": tenant_id} for tenant_id in tenant_ids], role=role,
+                          uis_token=self.auth.uis_token)
+        return self._scoped(api)
+
+    @staticmethod
+    def _close_session(scoped: "MDRManager") -> None:
+        scoped.auth.token_manager.cancel()
+        if not scoped.auth.session_shared:
+            scoped.auth.delete_session()
+
+    @contextmanager
+    def as_tenant(self, tenant_id: str, role: str = None):
+        """
+        Work in tenant scope without touching the session of this manager:
+            with manager.as_tenant(tenant_id) as tenant:
+                tenant.get_all_assets
+        Tenant session is kept in session_pool and reused by the next as_tenant, it has its own access token.
+        The session is not evicted from session_pool while the scope is active
+        """
+        key = SessionPool.key(self.client_id, [{"tenant_id": tenant_id}], role or self.auth.role)
+        with self.session_pool.lease(key) as scoped:
+            yield scoped
+
+    def close_sessions(self) -> None:
+        """
+        Delete all tenant sessions opened by as_tenant
+        """
+        self.session_pool.close()
+
     def delete_tenant(self, tenant_id: str) -> None:
         """
         Access token with root tenant does not have access to tenant.
-        Need access token with access to tenant for delete
+        Tenant is deleted through its own pooled session, the session is useless afterwards
         """
         tenant = {"tenant_id": tenant_id}
-        self.auth.to_login(tenants=[tenant])
-        self.tenants.delete(tenant)
-        self.auth.update_access_token()
+        with self.as_tenant(tenant_id) as scoped:
+            scoped.tenants.delete(tenant)
+        self.session_pool.discard(SessionPool.key(self.client_id, [tenant], self.auth.role))
 
     """
     -------------SCHEDULES API-------------
     """
 
-    def delete_schedules(self):
+    def delete_schedules(self, force_refresh: bool = False):
         """
-        Delete schedule if it is exist
+        Delete schedule if it is exist, existence is checked in the cached schedule list
+        param: force_refresh: request schedule list from the portal for the check
         """
-        if "weekly" in [_id["type"] for _id in self.schedules.get()]:
-            self.schedules.delete()
+        self.schedules.delete(force_refresh=force_refresh)
 
     """
     -------------ASSETS API-------------
     """
     @property
     def get_all_assets(self):
+        """
+        Cached inventory with all fields, see assets_ttl. Do not modify returned list
+        """
+        return self.asset_inventory.assets
+
+    def get_assets(self, fields: Optional[List[str]] = None):
+        """
+        Cached inventory with only the fields, the whole inventory already cached serves it without a download
+        """
+        return self.asset_inventory.get(fields)
+
+    def invalidate_assets(self, all_tenants: bool = False):
+        self.asset_inventory.invalidate(all_keys=all_tenants)
+
+    def _download_assets(self, fields: Optional[Tuple[str, ...]] = None):
         page_size = 10000
-        offset = 1
-        page = True
-        result = []
+        pages_count = math.ceil(self.get_assets_count() / page_size)
+        body = {"fields": list(fields)} if fields else {}
+
+        def fetch_page(page_number):
+            return self.api.assets.all_assets({**body, "page_size": page_size, "page": page_number})
+
+        return fetch_all(fetch_page, page_size, pages_count, concurrency=self.concurrency)
 
-        while page:
-            body = {
-                "page_size": page_size,
-                "page": offset
-            }
-            response = self.api.assets.all_assets(body)
+    def iter_assets(self, page_size=10000, body=None, prefetch=True, fields: Optional[List[str]] = None):
+        """
+        Stream assets page by page without the inventory cache, next page is requested while current is consumed
+        """
+        body = {**(body or {}), "fields": fields} if fields else body
+
+        def fetch_page(page_number):
+            return self.api.assets.all_assets({**(body or {}), "page_size": page_size, "page": page_number})
+
+        return iter_pages(fetch_page, page_size, prefetch=prefetch)
+
+    @property
+    def asset_index(self):
+        return self.asset_inventory.index
 
-            offset += 1
-            page = response
-            result.extend(page)
+    def assets_index(self, fields: Optional[List[str]] = ASSET_INDEX_FIELDS):
+        """
+        Index over the inventory with the fields, index fields are enough for all lookups
+        """
+        return self.asset_inventory.index_for(fields)
 
-        return result
+    def machine_sid3(self, host_name: str, fields: Optional[List[str]] = ASSET_INDEX_FIELDS, early_stop: bool = False):
+        """
+        param: early_stop: if the inventory is not cached, stream assets until the host is found
+            instead of loading the whole inventory into the cache
+        """
+        if early_stop and not self.asset_inventory.is_cached(fields):
+            assets = (asset for asset in self.iter_assets(fields=fields) if asset['host_name'] == host_name)
+        else:
+            assets = self.assets_index(fields).by_host_name(host_name)
 
-    def machine_sid3(self, host_name: str):
-        for asset in self.get_all_assets:
-            if host_name == asset.get('hostName'):
-                return asset['assetId']
+        for asset in assets:
+            return asset['asset_id']
 
         raise ValueError(f"This host name {host_name} was not found")
 
     @property
     def random_machine(self):
-        asset = random.choice(self.get_all_assets)
+        asset = random.choice(self.get_assets(ASSET_MIN_FIELDS))
         return asset["host_name"], asset["asset_id"]
 
-    def get_assets_by_hostname(self, asset_name):
-        assets = [asset for asset in self.get_all_assets if asset_name.upper() in asset["host_name"]]
-        return assets
+    def get_assets_by_hostname(self, asset_name, fields: Optional[List[str]] = None):
+        """
+        param: fields: fields of returned assets, all by default
+        """
+        return self.assets_index(fields).with_host_name_part(asset_name)
 
-    def asset_machinesid3(self, asset_name: str):
-        assets_by_hostname = self.get_assets_by_hostname(asset_name)
-        assets_by_hostname.sort(key=lambda asset: asset["last_seen"])
-        last_asset = assets_by_hostname.pop()
+    def asset_machinesid3(self, asset_name: str, fields: Optional[List[str]] = ASSET_INDEX_FIELDS):
+        last_asset = self.assets_index(fields).last_seen(asset_name)
+        if last_asset is None:
+            raise ValueError(f"Assets with host name {asset_name} were not found")
         return last_asset["asset_id"]
 
-    def assets_by_last_seen(self, platform, product):
-        assets_by_hostname = [asset for asset in self.get_all_assets
-                              if platform in asset["os_version"] and product in asset["product_map"]]
-        assets_by_hostname.sort(key=lambda asset: asset["last_seen"])
-        return assets_by_hostname
+    def assets_by_last_seen(self, platform, product, fields: Optional[List[str]] = None):
+        """
+        param: fields: fields of returned assets, all by default
+        """
+        return self.assets_index(fields).with_platform_and_product(platform, product)
 
-    def assets_by_statuses(self, status):
-        assets = [asset["host_name"] for asset in self.assets.get_all_assets if status in asset["status"]]
-        return assets
+    def assets_by_statuses(self, status, fields: Optional[List[str]] = ASSET_INDEX_FIELDS):
+        return [asset["host_name"] for asset in self.assets_index(fields).with_status(status)]
 
     def get_assets_count(self, body=None):
         count = self.api.assets.count(body)
@@ -146,22 +286,44 @@ class MDRManager:
     """
     -------------INCIDENTS API-------------
     """
-    def get_list_incidents(self, page_size=100, max_page=100, additional_body=None):
-        page_size = page_size
-        offset = 1
-        result = []
+    def get_list_incidents(self, page_size=100, max_page=100, additional_body=None, count_guided=False,
+                           concurrency=1, fields: Optional[List[str]] = None):
+        """
+        Walk incidents pages until the first short page or max_page
+        param: count_guided: request incidents count first and fetch only pages which contain incidents
+        param: concurrency: fetch pages in parallel, implies count_guided when greater than 1
+        param: fields: fields of returned incidents, all by default
+        """
+        if fields:
+            additional_body = {**(additional_body or {}), "fields": fields}
+
+        if count_guided or concurrency > 1:
+            count_body = {k: v for k, v in (additional_body or {}).items() if k not in ("page", "page_size", "fields")}
+            pages_count = math.ceil(self.get_incident_count(count_body) / page_size)
+
+            def fetch_page(page_number):
+                return self.api.incidents.get_incidents(page_size, page_number, additional_body)
+
+            return fetch_all(fetch_page, page_size, pages_count, concurrency=concurrency, max_page=max_page)
 
-        while offset <= max_page:
-            response = self.api.incidents.get_incidents(page_size, offset, additional_body)
+        return list(self.iter_incidents(page_size, max_page, additional_body))
 
-            offset += 1
-            result.extend(response)
+    def iter_incidents(self, page_size=100, max_page=100, additional_body=None, prefetch=True,
+                       fields: Optional[List[str]] = None):
+        """
+        Stream incidents page by page until the first short page or max_page
+        """
+        if fields:
+            additional_body = {**(additional_body or {}), "fields": fields}
 
-        return result
+        def fetch_page(page_number):
+            return self.api.incidents.get_incidents(page_size, page_number, additional_body)
+
+        return iter_pages(fetch_page, page_size, max_page=max_page, prefetch=prefetch)
 
     @property
     def get_all_incidents(self):
-        return self.get_list_incidents()
+        return self.get_list_incidents(concurrency=self.concurrency)
 
     def create_incident(self, affected_hosts: List[str], client_description, summary,
                         priority="HIGH", tenant_id="", no_sla_flag=False):
@@ -175,6 +337,27 @@ class MDRManager:
         }
         return self.api.incidents.create(body)
 
+    def create_incidents(self, specs: List[dict], concurrency: int = None, on_created: Callable[[dict], None] = None):
+        """
+        Create incidents in parallel, the first error is raised after all creations were tried
+        param: specs: create_incident arguments of every incident
+        param: on_created: called with every incident as soon as it is created, e.g. to register its teardown
+        :return: created incidents in the order of specs
+        """
+        def _create(spec):
+            incident = self.create_incident(**spec)
+            if on_created:
+                on_created(incident)
+            return incident
+
+        if not specs:
+            return []
+
+        concurrency = min(concurrency or self.concurrency, len(specs))
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='mdr_incidents') as executor:
+            futures = [executor.submit(_create, spec) for spec in specs]
+        return [future.result() for future in futures]
+
     def get_incident_count(self, body=None):
         count = self.api.incidents.count(body)
         return count["count"]
@@ -229,6 +412,56 @@ class MDRManager:
         body = {k: v for k, v in body.items() if v is not None}
         return self.api.incidents.history(body)
 
+    def wait_for_incident(self, incident_id: str, timeout: float = 30):
+        """
+        Wait until incident details are available
+        """
+        return wait_until(lambda: self.get_incident_details(incident_id), timeout=timeout,
+                          message=f'Incident {incident_id} details')
+
+    def wait_for_incident_history(self, incident_id: str, records: int, timeout: float = 30):
+        """
+        Wait until at least records history records of the incident are indexed
+        :return: incident history
+        """
+        def history_ready():
+            history = self.get_incidents_history(incident_id=incident_id)
+            return history if len(history) >= records else None
+
+        return wait_until(history_ready, timeout=timeout, message=f'{records} history records of incident {incident_id}')
+
+    def iter_incidents_history(
+        self,
+        *,
+        ignore_self: Optional[bool] = False,
+        incident_id: Optional[str] = None,
+        max_record_time: Optional[int] = None,
+        min_record_time: Optional[int] = None,
+        page_size: int = 100,
+    ):
+        """
+        History of all entity indexes merged in record_time order, requested page_size records per index at a time
+        """
+        cursor = HistoryCursor(self.get_incidents_history, page_size=page_size, min_record_time=min_record_time,
+                               ignore_self=ignore_self, incident_id=incident_id, max_record_time=max_record_time)
+        return iter(cursor)
+
+    def get_incidents_history_page(self, page: int, page_size: int, **filters):
+        """
+        Page of merged history: page_size records in total, unlike entity_type_page_size of get_incidents_history
+        """
+        start = (page - 1) * page_size
+        return list(islice(self.iter_incidents_history(page_size=page_size, **filters), start, start + page_size))
+
+    def sync_incidents_history(self, min_record_time: Optional[int] = None):
+        """
+        Request only history records newer than the previous sync
+        param: min_record_time: start of history for the first sync
+        :return: merged history of all syncs ordered by record_time
+        """
+        self.history_sync.sync(min_record_time)
+        return self.history_sync.history
+
     """
     -------------COMMENTS API-------------
     """
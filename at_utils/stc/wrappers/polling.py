@@ -0,0 +1,35 @@
+import logging
+import time
+from typing import Any, Callable
+
+logger = logging.getLogger()
+
+
+def wait_until(predicate: Callable[[], Any], timeout: float = 30, initial_delay: float = 0.1,
+               max_delay: float = 2, backoff: float = 2, message: str = 'Condition') -> Any:
+    """
+    Call predicate with exponential backoff until it returns truthy value.
+    AssertionError of predicate means "not ready yet"
+    :return: truthy value of predicate
+    """
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    attempt = 0
+
+    while True:
+        attempt += 1
+        try:
+            result = predicate()
+        except AssertionError as e:
+            logger.debug(f'{message} is not ready: {e}')
+            result = None
+
+        if result:
+            return result
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise AssertionError(f'{message} was not reached in {timeout}s after {attempt} attempts')
+
+        time.sleep(min(delay, remaining))
+        delay = min(delay * backoff, max_delay)
@@ -0,0 +1,2 @@
+# MDR API metrics and per test API cost report, registered once for all test suites
+pytest_plugins = ["at_utils.stc.api.pytest_plugin"]
@@ -1,44 +1,82 @@
 import logging
-from random import choice
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 from uuid import uuid4
 
 import pytest
+from at_utils.stc.api.fake_server import FakeMDRServer
+from at_utils.stc.wrappers.mdr_manager import MDRManager
+
+TEARDOWN_CONCURRENCY = 8
+
+
+def _incident_spec(mdr_api_manager, priority: str) -> dict:
+    """
+    create_incident arguments with random affected host from the cached assets inventory
+    """
+    incident_hex = uuid4().hex
+    logging.info(f"creating incident {incident_hex}")
+    host_name, asset_id = mdr_api_manager.random_machine
+    return {
+        "affected_hosts": [f"{host_name}:{asset_id}"],
+        "client_description": f"test_client_description_{incident_hex}",
+        "summary": f"API_test_{incident_hex}",
+        "priority": priority,
+    }
+
+
+def _delete_incidents(hive_api_manager, incidents: List[dict]):
+    """
+    Force delete incidents in parallel, the first error is raised after all deletions were tried
+    """
+    def _delete(incident):
+        logging.info(f"deleting incident {incident['incident_id']}")
+        hive_api_manager.delete_case(incident["incident_id"], force=True)
+
+    if not incidents:
+        return
+
+    with ThreadPoolExecutor(max_workers=min(TEARDOWN_CONCURRENCY, len(incidents))) as executor:
+        futures = [executor.submit(_delete, incident) for incident in incidents]
+    for future in futures:
+        future.result()
 
 
 @pytest.fixture(scope="class")
 def create_incident(mdr_api_manager, hive_api_manager):
     created_incidents = []
 
-    def _get_affected_hosts() -> List[str]:
-        """
-        Get random host from assets
-        :return: List of 1 affected host
-        """
-        asset = choice(mdr_api_manager.get_all_assets)
-        return [f"{asset['host_name']}:{asset['asset_id']}"]
-
     def _create_incident(priority='HIGH'):
         """
         Create incident with random affected hosts
         :return: Created incident
         """
-        incident_hex = uuid4().hex
-        logging.info(f"creating incident {incident_hex}")
-        affected_hosts = _get_affected_hosts()
-        incident = mdr_api_manager.create_incident(affected_hosts=affected_hosts,
-                                                   client_description=f"test_client_description_{incident_hex}",
-                                                   summary=f"API_test_{incident_hex}",
-                                                   priority=priority)
+        incident = mdr_api_manager.create_incident(**_incident_spec(mdr_api_manager, priority))
         created_incidents.append(incident)
         return incident
 
     yield _create_incident
 
     # Force delete all created incidents
-    for incident in created_incidents:
-        logging.info(f"deleting incident {incident['incident_id']}")
-        hive_api_manager.delete_case(incident["incident_id"], force=True)
+    _delete_incidents(hive_api_manager, created_incidents)
+
+
+@pytest.fixture(scope="class")
+def create_incidents(mdr_api_manager, hive_api_manager):
+    created_incidents = []
+
+    def _create_incidents(count: int, priority='HIGH', concurrency: int = None):
+        """
+        Create incidents in parallel with random affected hosts
+        :return: Created incidents
+        """
+        specs = [_incident_spec(mdr_api_manager, priority) for _ in range(count)]
+        # every created incident is deleted in teardown even if some others have failed
+        return mdr_api_manager.create_incidents(specs, concurrency=concurrency, on_created=created_incidents.append)
+
+    yield _create_incidents
+
+    _delete_incidents(hive_api_manager, created_incidents)
 
 
 @pytest.fixture(scope="class")
@@ -56,3 +94,19 @@ def create_comment(mdr_api_manager, create_incident):
     for comment in created_comments:
         logging.info(f"delete comment {comment['comment_id']}")
         mdr_api_manager.delete_comment(comment["comment_id"])
+
+
+@pytest.fixture(scope="class")
+def fake_mdr_server():
+    """
+    In-process MDR portal and UIS with seeded synthetic data, tests using it run offline
+    """
+    with FakeMDRServer(seed=1, assets=250, incidents=50) as server:
+        yield server
+
+
+@pytest.fixture(scope="class")
+def fake_mdr_manager(fake_mdr_server):
+    manager = MDRManager(**fake_mdr_server.manager_kwargs())
+    yield manager
+    manager.close_sessions()
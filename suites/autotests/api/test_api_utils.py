@@ -0,0 +1,348 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from types import SimpleNamespace
+
+import pytest
+import pytest_check as check
+import requests
+from at_utils.stc.api.metrics import ApiMetrics, LatencyHistogram
+from at_utils.stc.api.models import Asset, Tenant, decode, plain
+from at_utils.stc.api.pagination import fetch_all, fetch_pages, iter_pages
+from at_utils.stc.api.rate_limit import RateLimiter
+from at_utils.stc.api.retry import RetryPolicy
+from at_utils.stc.api.session_cache import SessionCache
+from at_utils.stc.api.session_pool import SessionPool
+from at_utils.stc.wrappers.asset_index import AssetIndex
+
+
+def _response(status: int = HTTPStatus.OK, retry_after: str = None):
+    headers = {"Retry-After": retry_after} if retry_after is not None else {}
+    return SimpleNamespace(status_code=status, headers=headers)
+
+
+def _pages(items: list, page_size: int, requested: list = None):
+    def fetch_page(page_number):
+        if requested is not None:
+            requested.append(page_number)
+        return items[(page_number - 1) * page_size:page_number * page_size]
+    return fetch_page
+
+
+class TestPagination:
+
+    def test_fetch_pages_keeps_order(self):
+        pages = fetch_pages(_pages(list(range(50)), 10), [3, 1, 2], concurrency=3)
+        check.equal(pages, [list(range(20, 30)), list(range(10)), list(range(10, 20))])
+
+    def test_fetch_all_fetches_grown_listing(self):
+        requested = []
+        # count said 2 pages, but the listing has grown since
+        items = fetch_all(_pages(list(range(35)), 10, requested), page_size=10, pages_count=2, concurrency=2)
+        check.equal(items, list(range(35)))
+        check.equal(sorted(requested), [1, 2, 3, 4])
+
+    def test_fetch_all_max_page(self):
+        items = fetch_all(_pages(list(range(100)), 10), page_size=10, pages_count=10, max_page=3)
+        check.equal(items, list(range(30)))
+
+    def test_iter_pages_stops_on_short_page(self):
+        requested = []
+        items = list(iter_pages(_pages(list(range(25)), 10, requested), page_size=10))
+        check.equal(items, list(range(25)))
+        check.equal(requested, [1, 2, 3])
+
+    def test_iter_pages_without_prefetch(self):
+        requested = []
+        items = iter_pages(_pages(list(range(25)), 10, requested), page_size=10, max_page=2, prefetch=False)
+        check.equal(next(items), 0)
+        check.equal(requested, [1])
+        check.equal(list(items), list(range(1, 20)))
+
+    def test_page_errors_are_not_retried(self):
+        requested = []
+
+        def fetch_page(page_number):
+            requested.append(page_number)
+            raise AssertionError('SC: 404')
+
+        with pytest.raises(AssertionError):
+            list(iter_pages(fetch_page, page_size=10))
+        check.equal(requested, [1])
+
+
+class TestRetryPolicy:
+
+    def test_retryable_statuses(self):
+        responses = iter([_response(HTTPStatus.TOO_MANY_REQUESTS, '0'), _response(HTTPStatus.BAD_GATEWAY, '0'),
+                          _response()])
+        retries = []
+        response = RetryPolicy(base_delay=0).send(lambda: next(responses),
+                                                  on_retry=lambda attempt, reason: retries.append(reason))
+        check.equal(response.status_code, HTTPStatus.OK)
+        check.equal(retries, ['SC 429', 'SC 502'])
+
+    def test_client_errors_are_not_retried(self):
+        responses = iter([_response(HTTPStatus.NOT_FOUND), _response()])
+        check.equal(RetryPolicy(base_delay=0).send(lambda: next(responses)).status_code, HTTPStatus.NOT_FOUND)
+
+    def test_last_response_is_returned_when_retries_are_over(self):
+        calls = []
+
+        def request():
+            calls.append(1)
+            return _response(HTTPStatus.SERVICE_UNAVAILABLE, '0')
+
+        check.equal(RetryPolicy(max_attempts=3).send(request).status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        check.equal(len(calls), 3)
+
+    def test_retry_after(self):
+        check.equal(RetryPolicy.retry_after(_response(retry_after='2.5')), 2.5)
+        check.is_none(RetryPolicy.retry_after(_response(retry_after='soon')))
+        check.is_none(RetryPolicy.retry_after(_response()))
+        http_date = time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(time.time() + 30))
+        check.between(RetryPolicy.retry_after(_response(retry_after=http_date)), 25, 31)
+
+    def test_deadline(self):
+        started = time.monotonic()
+        response = RetryPolicy(max_attempts=10, deadline=1).send(
+            lambda: _response(HTTPStatus.TOO_MANY_REQUESTS, '5'))
+        check.equal(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        check.less(time.monotonic() - started, 1)
+
+    def test_connection_errors_are_retried(self):
+        errors = [requests.ConnectionError('reset')]
+
+        def request():
+            if errors:
+                raise errors.pop()
+            return _response()
+
+        check.equal(RetryPolicy(base_delay=0).send(request).status_code, HTTPStatus.OK)
+
+    def test_non_idempotent(self):
+        def timeout():
+            raise requests.Timeout('read timeout')
+
+        policy = RetryPolicy(base_delay=0).non_idempotent()
+        with pytest.raises(requests.Timeout):
+            policy.send(timeout)
+
+        responses = iter([_response(HTTPStatus.INTERNAL_SERVER_ERROR), _response()])
+        check.equal(policy.send(lambda: next(responses)).status_code, HTTPStatus.INTERNAL_SERVER_ERROR)
+
+        responses = iter([_response(HTTPStatus.SERVICE_UNAVAILABLE, '0'), _response()])
+        check.equal(policy.send(lambda: next(responses)).status_code, HTTPStatus.OK)
+
+
+class TestRateLimiter:
+
+    def test_limits_for_prefixes(self):
+        limiter = RateLimiter({"": {"max_in_flight": 4}, "/assets/": {"rate": 10}, "/assets/list": {"rate": 1}})
+        check.equal(len(limiter.limits_for('/{client_id}/assets/list')), 3)
+        check.equal(len(limiter.limits_for('/{client_id}/assets/count')), 2)
+        check.equal(len(limiter.limits_for('/{client_id}/incidents/list')), 1)
+
+    def test_rate(self):
+        limiter = RateLimiter({"/incidents/": {"rate": 20, "burst": 1}})
+        started = time.monotonic()
+        for _ in range(5):
+            with limiter.slot('/{client_id}/incidents/list'):
+                pass
+        check.greater_equal(time.monotonic() - started, 0.15)
+
+    def test_max_in_flight(self):
+        limiter = RateLimiter({"": {"max_in_flight": 2}})
+        lock = threading.Lock()
+        in_flight = []
+        peak = []
+
+        def request(_):
+            with limiter.slot('/{client_id}/assets/list'):
+                with lock:
+                    in_flight.append(1)
+                    peak.append(len(in_flight))
+                time.sleep(0.02)
+                with lock:
+                    in_flight.pop()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(request, range(16)))
+        check.equal(max(peak), 2)
+
+
+class TestSessionCache:
+
+    def test_put_get_remove(self, tmp_path):
+        cache = SessionCache(str(tmp_path / 'sessions.json'))
+        key = cache.key('client', [{"tenant_id": "b"}, {"tenant_id": "a"}], 'SUPERVISOR')
+        check.equal(key, cache.key('client', [{"tenant_id": "a"}, {"tenant_id": "b"}], 'SUPERVISOR'))
+
+        with cache.locked():
+            check.is_none(cache.get(key))
+            cache.put(key, 'refresh', 'session')
+        entry = cache.get(key)
+        check.equal(entry["refresh_token"].value, 'refresh')
+        check.equal(entry["session_id"], 'session')
+        check.equal((tmp_path / 'sessions.json').stat().st_mode & 0o777, 0o600)
+
+        cache.remove(key)
+        check.is_none(cache.get(key))
+
+    def test_corrupted_file(self, tmp_path):
+        path = tmp_path / 'sessions.json'
+        path.write_text('{')
+        cache = SessionCache(str(path))
+        check.is_none(cache.get('key'))
+        cache.put('key', 'refresh', 'session')
+        check.equal(json.loads(path.read_text())["key"]["session_id"], 'session')
+
+
+class TestSessionPool:
+
+    def test_least_recently_used_is_evicted(self):
+        closed = []
+        pool = SessionPool(opener=lambda key: f'session {key}', closer=closed.append, max_sessions=2)
+        pool.get('a')
+        pool.get('b')
+        pool.get('a')
+        pool.get('c')
+
+        check.is_in('a', pool)
+        check.is_not_in('b', pool)
+        check.equal(closed, ['session b'])
+
+        pool.close()
+        check.equal(len(pool), 0)
+        check.equal(sorted(closed), ['session a', 'session b', 'session c'])
+
+    def test_one_login_per_key(self):
+        opened = []
+
+        def opener(key):
+            opened.append(key)
+            time.sleep(0.05)
+            return object()
+
+        pool = SessionPool(opener=opener, closer=lambda session: None)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            sessions = list(executor.map(lambda _: pool.get('key'), range(8)))
+        check.equal(opened, ['key'])
+        check.equal(len({id(session) for session in sessions}), 1)
+
+    def test_discard(self):
+        closed = []
+        pool = SessionPool(opener=lambda key: key, closer=closed.append)
+        pool.get('a')
+        pool.discard('a')
+        pool.discard('unknown')
+        check.equal(closed, ['a'])
+        check.is_not_in('a', pool)
+
+    def test_leased_session_is_not_evicted(self):
+        closed = []
+        pool = SessionPool(opener=lambda key: f'session {key}', closer=closed.append, max_sessions=1)
+        with pool.lease('a') as outer:
+            with pool.lease('b') as inner:
+                check.equal(inner, 'session b')
+                check.equal(closed, [])
+            check.equal(closed, ['session b'])
+            check.is_in('a', pool)
+            check.equal(pool.get('a'), outer)
+
+            pool.discard('a')
+            check.equal(closed, ['session b'])
+        check.equal(closed, ['session b', 'session a'])
+        check.equal(len(pool), 0)
+
+
+class TestMetrics:
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for latency in range(1, 101):
+            histogram.add(latency / 1000)
+        result = histogram.to_dict()
+
+        check.almost_equal(result["p50"], 0.05)
+        check.almost_equal(result["p99"], 0.099)
+        check.equal(result["max"], 0.1)
+        check.almost_equal(result["total"], 5.05)
+        check.equal(sum(result["buckets"].values()), 100)
+
+    def test_percentile_is_not_above_max(self):
+        histogram = LatencyHistogram()
+        histogram.add(70)
+        check.equal(histogram.percentile(99), 70)
+        check.is_none(LatencyHistogram().percentile(50))
+
+    def test_record(self):
+        metrics = ApiMetrics()
+        samples = []
+        metrics.add_listener(lambda endpoint, sample: samples.append((endpoint, sample)))
+        response = SimpleNamespace(status_code=200, content=b'{}', request=SimpleNamespace(body=b'{"a": 1}'))
+
+        metrics.record('/{client_id}/assets/list', 0.1, response)
+        metrics.record('/{client_id}/assets/list', 0.2, error=requests.Timeout())
+        metrics.record_retry('/{client_id}/assets/list')
+
+        stats = metrics.snapshot()['/{client_id}/assets/list']
+        check.equal(stats["requests"], 2)
+        check.equal(stats["errors"], 1)
+        check.equal(stats["retries"], 1)
+        check.equal(stats["bytes_in"], 2)
+        check.equal(stats["bytes_out"], 8)
+        check.equal(stats["statuses"], {"200": 1, "Timeout": 1})
+        check.equal([sample["error"] for _, sample in samples], [None, 'Timeout'])
+
+    def test_dump(self, tmp_path):
+        metrics = ApiMetrics()
+        metrics.record('/{client_id}/tenants/list', 0.01)
+        path = tmp_path / 'metrics' / 'api.json'
+        metrics.dump(str(path))
+        check.equal(json.loads(path.read_text())['/{client_id}/tenants/list']["requests"], 1)
+
+
+class TestModels:
+
+    def test_record_is_a_mapping(self):
+        asset = Asset({"asset_id": "A1", "host_name": "WS-1", "custom": 1})
+
+        check.equal(asset["host_name"], "WS-1")
+        check.equal(asset.get("status", "missing"), "missing")
+        check.is_in("custom", asset)
+        check.is_not_in("status", asset)
+        check.equal(dict(asset), {"asset_id": "A1", "host_name": "WS-1", "custom": 1})
+        check.equal(asset, {"asset_id": "A1", "host_name": "WS-1", "custom": 1})
+        with pytest.raises(KeyError):
+            asset["status"]
+
+    def test_record_has_no_dict(self):
+        check.is_false(hasattr(Tenant({"tenant_id": "1"}), '__dict__'))
+
+    def test_decode(self):
+        tenants = decode(b'[{"tenant_id": "1", "tenant_name": "a"}, {"tenant_id": "2"}]', Tenant)
+        check.equal([tenant.to_dict() for tenant in tenants],
+                    [{"tenant_id": "1", "tenant_name": "a"}, {"tenant_id": "2"}])
+        check.is_instance(decode('{"tenant_id": "1"}', Tenant), Tenant)
+
+    def test_plain(self):
+        tenant = Tenant({"tenant_id": "1", "tenant_name": "a"})
+        body = plain({"tenants": [tenant], "tenant": tenant, "ids": ("1",)})
+        check.equal(json.loads(json.dumps(body)), {"tenants": [{"tenant_id": "1", "tenant_name": "a"}],
+                                                   "tenant": {"tenant_id": "1", "tenant_name": "a"}, "ids": ["1"]})
+
+
+class TestAssetIndex:
+
+    def test_host_name_part_is_upper_cased_query(self):
+        # the same as the original lookup: asset_name.upper() in asset["host_name"]
+        index = AssetIndex([{"asset_id": "1", "host_name": "ws-001"}, {"asset_id": "2", "host_name": "WS-002"},
+                            {"asset_id": "3", "host_name": "Ws-003"}, {"asset_id": "4", "host_name": "SRV-WS-4"}])
+
+        check.equal([asset["asset_id"] for asset in index.with_host_name_part("ws-00")], ["2"])
+        check.equal([asset["asset_id"] for asset in index.with_host_name_part("ws")], ["2", "4"])
+        check.equal(index.with_host_name_part("ws-001"), [])
+        check.equal(index.last_seen("ws")["asset_id"], "4")
@@ -3,6 +3,7 @@ import random
 
 import pytest_check as check
 from at_utils.constants.markers import *
+from at_utils.stc.wrappers.mdr_manager import ASSET_INDEX_FIELDS
 
 logger = logging.getLogger()
 
@@ -53,5 +54,32 @@ class TestApiAssets:
         assert len(suggestions_list) != 0, "No assets were found"
         assert all([host_name in suggestion for suggestion in suggestions_list])
 
+    def test_assets_index_lookups(self, mdr_api_manager):
+        assets = mdr_api_manager.get_all_assets
+        asset_random = random.choice(assets)
+        host_name = asset_random['host_name']
+
+        check.equal(mdr_api_manager.machine_sid3(host_name), asset_random['asset_id'])
+        check.equal(mdr_api_manager.get_assets_by_hostname(host_name),
+                    [asset for asset in assets if host_name.upper() in asset['host_name']])
 
+        expected_last_seen = max((asset for asset in assets if host_name.upper() in asset['host_name']),
+                                 key=lambda asset: asset['last_seen'])
+        check.equal(mdr_api_manager.asset_machinesid3(host_name), expected_last_seen['asset_id'])
 
+        status = asset_random['status']
+        check.equal(mdr_api_manager.assets_by_statuses(status),
+                    [asset['host_name'] for asset in assets if status in asset['status']])
+
+    def test_assets_fields_projection(self, mdr_api_manager):
+        fields = ["asset_id", "host_name"]
+        mdr_api_manager.invalidate_assets()
+        assets = mdr_api_manager.get_assets(fields=fields)
+
+        assert len(assets) >= MIN_ASSETS_NUM
+        # narrower projection is downloaded with the index fields shared by all asset lookups
+        check.is_true(all(set(fields) <= asset.keys() <= set(ASSET_INDEX_FIELDS) for asset in assets),
+                      f"Expected fields: {fields}, result: {assets[0].keys()}")
+        check.is_true(assets is mdr_api_manager.get_assets(fields=fields), "Projection was not served from cache")
+        check.is_true(assets is mdr_api_manager.get_assets(fields=ASSET_INDEX_FIELDS),
+                      "Index projection was downloaded again")
@@ -1,37 +1,37 @@
 from collections import Counter
-from time import sleep
 
 import pytest_check as check
 from at_utils.constants.markers import *
 
 
 @pytest.fixture(scope="class")
-def create_history(create_comment, create_incident):
+def create_history(create_comment, create_incident, mdr_api_manager):
     """
     History creation - Create the inicident and two comments for the incident
     In the result history contains 5 records
     1-st - creation of the incident
     2-nd and 4-th - creation of comments
     3-rd and 5-th - incident update (comment addition), but only update_time is changing in the history
+    Every step waits until its records are indexed, so creation_time of the records differs
     """
     incidents = []
     comments = []
 
     incident_1 = create_incident()  # +1 record in history
-    sleep(2)
+    mdr_api_manager.wait_for_incident_history(incident_1["incident_id"], records=1)
     comments.append(create_comment(incident_1["incident_id"], "test_comment_1"))  # +2 records in history
-    sleep(2)
+    mdr_api_manager.wait_for_incident_history(incident_1["incident_id"], records=3)
     comments.append(create_comment(incident_1["incident_id"], "test_comment_2"))  # +2 records in history
+    mdr_api_manager.wait_for_incident_history(incident_1["incident_id"], records=5)
     incidents.append(incident_1)
-    sleep(2)
 
     incident_2 = create_incident()
-    sleep(2)
+    mdr_api_manager.wait_for_incident_history(incident_2["incident_id"], records=1)
     comments.append(create_comment(incident_2["incident_id"], "test_comment_3"))
-    sleep(2)
+    mdr_api_manager.wait_for_incident_history(incident_2["incident_id"], records=3)
     comments.append(create_comment(incident_2["incident_id"], "test_comment_4"))
+    mdr_api_manager.wait_for_incident_history(incident_2["incident_id"], records=5)
     incidents.append(incident_2)
-    sleep(2)
     return incidents, comments
 
 
@@ -224,6 +224,33 @@ class TestIncidentHistory:
             f"Incident is not equal to history record: {self.dict_diff(incident, self._get_entity(history[0]))}",
         )
 
+    def test_merged_history_pages(self, create_history, mdr_api_manager):
+        """
+        Client side pagination over all history indexes has true page semantics
+        """
+        incidents, comments = create_history
+        incident = incidents[0]
+
+        history = mdr_api_manager.get_incidents_history(incident_id=incident["incident_id"])
+        pages = [mdr_api_manager.get_incidents_history_page(page=page, page_size=2, incident_id=incident["incident_id"])
+                 for page in (1, 2, 3)]
+
+        assert [len(page) for page in pages] == [2, 2, 1]
+        check.equal([record for page in pages for record in page], history)
+
+    def test_iter_history_is_ordered(self, create_history, mdr_api_manager):
+        """
+        Merged history iterator returns all records ordered by record_time
+        """
+        incidents, comments = create_history
+        incident = incidents[1]
+
+        history = list(mdr_api_manager.iter_incidents_history(incident_id=incident["incident_id"], page_size=1))
+
+        assert len(history) == 5
+        record_times = [record["record_time"] for record in history]
+        check.equal(record_times, sorted(record_times))
+
     def test_history_for_all_incidents(self, create_history, mdr_api_manager):
         """
         Full history not specifying the incident
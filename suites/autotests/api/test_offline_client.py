@@ -0,0 +1,298 @@
+import asyncio
+import time
+from http import HTTPStatus
+
+import pytest
+import pytest_check as check
+from at_utils.stc.api.async_api import AsyncMDRRestAPi
+from at_utils.stc.api.models import Tenant
+from at_utils.stc.wrappers.mdr_manager import ASSET_INDEX_FIELDS, MDRManager
+
+ASSETS_COUNT = 250
+
+
+class TestOfflineAuth:
+    """
+    Login, refresh and expiration of tokens against the fake MDR server
+    """
+
+    def test_login(self, fake_mdr_server, fake_mdr_manager):
+        auth = fake_mdr_manager.auth
+        check.is_in(auth.session_id, [session["session_id"] for session in fake_mdr_server.sessions])
+        check.is_not_none(auth.token_manager.expires_at)
+
+    def test_refresh_keeps_session(self, fake_mdr_server, fake_mdr_manager):
+        auth = fake_mdr_manager.auth
+        session_id, access_token = auth.session_id, auth.access_token
+        confirms = fake_mdr_server.calls['/{client_id}/session/confirm']
+
+        auth.refresh()
+
+        check.equal(auth.session_id, session_id)
+        check.not_equal(auth.access_token, access_token)
+        check.equal(fake_mdr_server.calls['/{client_id}/session/confirm'], confirms + 1)
+
+    def test_expiring_token_is_refreshed_before_request(self, fake_mdr_server, fake_mdr_manager):
+        confirms = fake_mdr_server.calls['/{client_id}/session/confirm']
+        fake_mdr_manager.auth.token_manager.expires_at = time.time()
+
+        check.equal(fake_mdr_manager.get_assets_count(), ASSETS_COUNT)
+        check.equal(fake_mdr_server.calls['/{client_id}/session/confirm'], confirms + 1)
+        check.is_false(fake_mdr_manager.auth.token_manager.expires_soon)
+
+    def test_expired_access_token_is_refreshed(self, fake_mdr_server, fake_mdr_manager):
+        fake_mdr_server.expire_tokens()
+        fake_mdr_manager.auth.refresh()
+        check.equal(fake_mdr_manager.get_assets_count(), ASSETS_COUNT)
+
+    def test_invalid_refresh_token(self, fake_mdr_server, fake_mdr_manager):
+        auth = fake_mdr_manager.auth
+        session_id = auth.session_id
+        auth.refresh_token = 'invalid'
+
+        # background refresh must not login again
+        with pytest.raises(AssertionError):
+            auth.refresh(relogin=False)
+        check.equal(auth.session_id, session_id)
+
+        auth.refresh()
+        check.not_equal(auth.session_id, session_id)
+        check.is_not_in(session_id, [session["session_id"] for session in fake_mdr_server.sessions])
+
+    def test_uis_token_is_requested_again_when_expires(self, fake_mdr_server):
+        manager = MDRManager(**fake_mdr_server.manager_kwargs())
+        token_manager = manager.auth.token_manager
+        token_manager.background = False
+        token_manager.leeway = fake_mdr_server.token_ttl
+        uis_token = manager.auth.uis_token
+
+        check.not_equal(manager.auth.uis_token.value, uis_token.value)
+        manager.auth.delete_session()
+
+    def test_expired_uis_token_is_rejected(self, fake_mdr_server, fake_mdr_manager):
+        auth = fake_mdr_manager.auth
+        stale_uis_token = auth.uis_token
+        fake_mdr_server.expire_tokens(uis=True)
+
+        with pytest.raises(AssertionError):
+            auth._refresh_token(stale_uis_token, auth.client_id)
+
+        auth.relogin()
+        check.not_equal(auth.uis_token.value, stale_uis_token.value)
+        check.equal(fake_mdr_manager.get_assets_count(), ASSETS_COUNT)
+
+    def test_stale_token_keeps_tenant_session(self, fake_mdr_server, fake_mdr_manager):
+        tenant_id = "00000000-0000-0000-0000-000000000021"
+        with fake_mdr_manager.as_tenant(tenant_id) as scoped:
+            auth = scoped.auth
+            stale_token, session_id = auth.access_token, auth.session_id
+            auth.refresh_token = 'invalid'
+
+            auth.update_access_token(stale_token)
+            check.not_equal(auth.session_id, session_id)
+            check.equal(auth.tenants, [{"tenant_id": tenant_id}])
+            sessions = {session["session_id"]: session for session in fake_mdr_server.sessions}
+            check.equal(sessions[auth.session_id]["tenants"], [{"tenant_id": tenant_id}])
+
+            # the second caller with the same stale token reuses the new session
+            relogged_session_id = auth.session_id
+            check.equal(auth.update_access_token(stale_token), auth.access_token)
+            check.equal(auth.session_id, relogged_session_id)
+
+    def test_delete_session_cancels_refresh(self, fake_mdr_server):
+        manager = MDRManager(**fake_mdr_server.manager_kwargs())
+        session_id = manager.auth.session_id
+
+        manager.auth.delete_session()
+
+        check.is_none(manager.auth.token_manager._timer)
+        check.is_not_in(session_id, [session["session_id"] for session in fake_mdr_server.sessions])
+
+
+class TestOfflineRetries:
+    """
+    Retries of MDRRestAPi.post against injected errors of the fake MDR server
+    """
+
+    def test_too_many_requests_is_retried_after_delay(self, fake_mdr_server, fake_mdr_manager):
+        endpoint = '/{client_id}/assets/count'
+        calls = fake_mdr_server.calls[endpoint]
+        fake_mdr_server.inject_error(endpoint, status=HTTPStatus.TOO_MANY_REQUESTS, count=2, retry_after=0.2)
+
+        started = time.monotonic()
+        check.equal(fake_mdr_manager.get_assets_count(), ASSETS_COUNT)
+        check.greater_equal(time.monotonic() - started, 0.4, "Retry-After was not respected")
+        check.equal(fake_mdr_server.calls[endpoint], calls + 3)
+
+    def test_not_found_is_not_retried(self, fake_mdr_server, fake_mdr_manager):
+        endpoint = '/{client_id}/incidents/details'
+        calls = fake_mdr_server.calls[endpoint]
+        with pytest.raises(AssertionError):
+            fake_mdr_manager.get_incident_details('unknown')
+        check.equal(fake_mdr_server.calls[endpoint], calls + 1)
+
+    def test_create_is_not_resent_after_server_error(self, fake_mdr_server, fake_mdr_manager):
+        endpoint = '/{client_id}/incidents/create'
+        calls = fake_mdr_server.calls[endpoint]
+        fake_mdr_server.inject_error(endpoint, status=HTTPStatus.INTERNAL_SERVER_ERROR)
+        host_name, asset_id = fake_mdr_manager.random_machine
+
+        with pytest.raises(AssertionError):
+            fake_mdr_manager.create_incident([f"{host_name}:{asset_id}"], "offline", "offline")
+        check.equal(fake_mdr_server.calls[endpoint], calls + 1)
+
+    def test_create_is_retried_when_not_processed(self, fake_mdr_server, fake_mdr_manager):
+        endpoint = '/{client_id}/incidents/create'
+        calls = fake_mdr_server.calls[endpoint]
+        fake_mdr_server.inject_error(endpoint, status=HTTPStatus.SERVICE_UNAVAILABLE, retry_after=0)
+        host_name, asset_id = fake_mdr_manager.random_machine
+
+        incident = fake_mdr_manager.create_incident([f"{host_name}:{asset_id}"], "offline", "offline")
+        check.equal(incident["summary"], "offline")
+        check.equal(fake_mdr_server.calls[endpoint], calls + 2)
+
+
+class TestOfflineAsync:
+    """
+    Requests fanned out by AsyncMDRRestAPi to the fake MDR server
+    """
+
+    def test_fan_out(self, fake_mdr_server, fake_mdr_manager):
+        endpoint = '/{client_id}/assets/count'
+        calls = fake_mdr_server.calls[endpoint]
+
+        async def fan_out():
+            async with AsyncMDRRestAPi(api=fake_mdr_manager.api, concurrency=4) as api:
+                return await api.gather(api.assets.count(None) for _ in range(16))
+
+        counts = asyncio.run(fan_out())
+        check.equal([count["count"] for count in counts], [ASSETS_COUNT] * 16)
+        check.equal(fake_mdr_server.calls[endpoint], calls + 16)
+
+
+class TestOfflineAssets:
+    """
+    Asset inventory, projections and paging against the fake MDR server
+    """
+
+    def test_projection_is_served_from_cache(self, fake_mdr_server, fake_mdr_manager):
+        endpoint = '/{client_id}/assets/list'
+        fake_mdr_manager.invalidate_assets()
+        calls = fake_mdr_server.calls[endpoint]
+
+        assets = fake_mdr_manager.get_assets(fields=ASSET_INDEX_FIELDS)
+
+        check.equal(len(assets), ASSETS_COUNT)
+        check.is_true(all(set(asset) == set(ASSET_INDEX_FIELDS) for asset in assets))
+        check.is_true(fake_mdr_manager.get_assets(fields=ASSET_INDEX_FIELDS) is assets)
+        check.is_true(fake_mdr_manager.get_assets(fields=["asset_id", "host_name"]) is assets,
+                      "Narrower projection was not served by the cached one")
+        check.equal(fake_mdr_server.calls[endpoint], calls + 1)
+
+    def test_lookups_share_one_download(self, fake_mdr_server, fake_mdr_manager):
+        endpoint = '/{client_id}/assets/list'
+        fake_mdr_manager.invalidate_assets()
+        calls = fake_mdr_server.calls[endpoint]
+
+        host_name, asset_id = fake_mdr_manager.random_machine
+        status = fake_mdr_manager.assets_index().asset(asset_id)["status"]
+        check.equal(fake_mdr_manager.machine_sid3(host_name), asset_id)
+        check.is_in(host_name, fake_mdr_manager.assets_by_statuses(status))
+        check.equal(fake_mdr_server.calls[endpoint], calls + 1)
+
+    def test_iter_assets_pages(self, fake_mdr_server, fake_mdr_manager):
+        endpoint = '/{client_id}/assets/list'
+        calls = fake_mdr_server.calls[endpoint]
+
+        assets = list(fake_mdr_manager.iter_assets(page_size=100, fields=["asset_id"]))
+
+        check.equal(len({asset["asset_id"] for asset in assets}), ASSETS_COUNT)
+        check.equal(fake_mdr_server.calls[endpoint], calls + 3)
+
+    def test_incidents_pages(self, fake_mdr_server, fake_mdr_manager):
+        incidents = fake_mdr_manager.get_list_incidents(page_size=20, concurrency=4)
+        check.equal(len(incidents), fake_mdr_manager.get_incident_count())
+        check.equal(len({incident["incident_id"] for incident in incidents}), len(incidents))
+
+        streamed = list(fake_mdr_manager.iter_incidents(page_size=20, fields=["incident_id"]))
+        check.equal([incident["incident_id"] for incident in streamed],
+                    [incident["incident_id"] for incident in incidents])
+
+
+class TestOfflineHistory:
+    """
+    Incidents history merged over entity indexes of the fake MDR server
+    """
+
+    def test_merged_history_is_ordered(self, fake_mdr_server, fake_mdr_manager):
+        history = list(fake_mdr_manager.iter_incidents_history(page_size=7))
+
+        record_times = [record["record_time"] for record in history]
+        check.equal(record_times, sorted(record_times))
+        check.equal(len(history), len(fake_mdr_server.client().history))
+
+    def test_history_page(self, fake_mdr_server, fake_mdr_manager):
+        history = list(fake_mdr_manager.iter_incidents_history(page_size=100))
+        check.equal(fake_mdr_manager.get_incidents_history_page(page=2, page_size=10), history[10:20])
+
+    def test_comment_history(self, fake_mdr_server, fake_mdr_manager):
+        incident = fake_mdr_manager.get_list_incidents(page_size=1, max_page=1)[0]
+        fake_mdr_manager.create_comment(incident["incident_id"], "offline comment")
+
+        history = fake_mdr_manager.get_incidents_history(incident_id=incident["incident_id"])
+        check.is_true(any("incident_comment" in record["entity"] for record in history), f"No comment records in {history}")
+
+
+class TestOfflineSchedules:
+    """
+    Cached schedule list: no-op writes are skipped
+    """
+
+    def test_create_is_skipped_for_existing_schedule(self, fake_mdr_server, fake_mdr_manager):
+        endpoint = '/{client_id}/schedules/create'
+        body = {"type": "weekly", "day": "MONDAY"}
+        created = fake_mdr_manager.schedules.create(body)
+        calls = fake_mdr_server.calls[endpoint]
+
+        check.equal(fake_mdr_manager.schedules.create(body), created)
+        check.equal(fake_mdr_server.calls[endpoint], calls)
+
+        check.equal(fake_mdr_manager.schedules.create(body, force_refresh=True), created)
+        check.equal(fake_mdr_server.calls[endpoint], calls + 1)
+
+    def test_delete_is_skipped_for_missing_schedule(self, fake_mdr_server, fake_mdr_manager):
+        endpoint = '/{client_id}/schedules/delete'
+        fake_mdr_manager.schedules.create({"type": "weekly", "day": "MONDAY"})
+        calls = fake_mdr_server.calls[endpoint]
+
+        deleted = fake_mdr_manager.schedules.delete()
+        check.equal(fake_mdr_manager.schedules.delete(), deleted)
+        check.equal(fake_mdr_server.calls[endpoint], calls + 1)
+
+        lists = fake_mdr_server.calls['/{client_id}/schedules/list']
+        check.equal(fake_mdr_manager.schedules.delete(force_refresh=True), deleted)
+        check.equal(fake_mdr_server.calls['/{client_id}/schedules/list'], lists + 1)
+        check.equal(fake_mdr_server.calls[endpoint], calls + 1)
+
+
+class TestOfflineModels:
+    """
+    Slot based records returned with models=True and sent back as request bodies
+    """
+
+    def test_record_round_trip(self, fake_mdr_server):
+        manager = MDRManager(**fake_mdr_server.manager_kwargs(), models=True)
+        manager.tenants.create({"tenant_name": "offline_tenant"})
+
+        tenant = manager.tenants.tenant_info("offline_tenant")
+        check.is_instance(tenant, Tenant)
+        lists = fake_mdr_server.calls['/{client_id}/tenants/list']
+        with manager.as_tenant(tenant["tenant_id"]) as scoped:
+            # tenant directory is shared by sessions of the client
+            check.equal(scoped.tenants.tenant_by_id(tenant["tenant_id"]), tenant)
+            check.equal(fake_mdr_server.calls['/{client_id}/tenants/list'], lists)
+            scoped.tenants.delete(tenant)
+
+        check.is_none(manager.tenants.tenant_by_id(tenant["tenant_id"]))
+        manager.close_sessions()
+        manager.auth.delete_session()